@@ -0,0 +1,103 @@
+""" Timing of delish.cleaning.clean_dataframe against the legacy implementation.
+
+    legacy_clean_dataframe below is the clean_dataframe that used to live in
+    pages/1_Orders_Analytics.py; expected_output applies the steps the pipeline added since on
+    top of it. tests/test_cleaning.py checks that the pipeline still matches it (whole file and
+    chunked); this script prints the timings of both as JSON.
+
+        python -m benchmarks.bench_cleaning [data/train.csv] [--repeat 5] [--chunksize 10000]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import json
+import time
+import argparse
+
+import pandas as pd
+
+from delish.geo      import delivery_distance_km
+from delish.schema   import apply_schema
+from delish.cleaning import clean_dataframe, concat_cleaned
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def legacy_clean_dataframe(df1):
+    """ The Orders page implementation before the shared pipeline, verbatim. """
+    # removing NA
+    df1 = df1.loc[(df1['Delivery_person_Age'] != 'NaN '), :]
+    df1 = df1.loc[(df1['City'] != 'NaN '), :]
+    df1 = df1.loc[(df1['Road_traffic_density'] != 'NaN '), :]
+    df1 = df1.loc[(df1['Festival'] != 'NaN '), :]
+    df1 = df1.loc[(df1['multiple_deliveries'] != 'NaN '), :]
+    df1 = df1.loc[(df1['Time_Orderd'] != 'NaN '), :]
+
+    # data types conversion
+    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
+    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
+
+    # removing blank spaces
+    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
+    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
+    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
+    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
+    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
+    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
+    # time taken column
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip(('(min) ')).astype(int)
+
+    # creating the day and week of year columns
+    df1['Order_Date_Day'] = df1.Order_Date.dt.day.astype(int)
+    df1['Week_Of_Year'] = df1.Order_Date.dt.isocalendar().week.astype(int)
+
+    return df1
+
+def expected_output(raw):
+    """ Legacy cleaning plus the steps the pipeline added since: order timestamp, distance
+        column, weather normalization and schema.
+    """
+    df1 = legacy_clean_dataframe(raw.copy())
+    df1['Order_Timestamp'] = df1['Order_Date'] + pd.to_timedelta(df1['Time_Orderd'], errors='coerce')
+    df1['Distance_delivery'] = delivery_distance_km(df1)
+
+    # 'conditions Fog' -> 'Fog', 'conditions NaN' -> missing
+    weather = df1['Weatherconditions'].str.strip().str.replace('conditions', '', n=1).str.strip()
+    df1['Weatherconditions'] = weather.where(weather != 'NaN')
+
+    return apply_schema(df1)
+
+def best_of(fn, repeat):
+    """ Best wall time of `repeat` calls of fn, and the result of the last one. """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('path', nargs='?', default='data/train.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--chunksize', type=int, default=10_000)
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.path)
+    chunks = [raw.iloc[start:start + args.chunksize] for start in range(0, len(raw), args.chunksize)]
+
+    legacy_s, expected = best_of(lambda: expected_output(raw), args.repeat)
+    current_s, _ = best_of(lambda: clean_dataframe(raw), args.repeat)
+    chunked_s, _ = best_of(lambda: concat_cleaned(clean_dataframe(chunk) for chunk in chunks), args.repeat)
+
+    print(json.dumps({'rows_in': len(raw), 'rows_out': len(expected), 'legacy_seconds': round(legacy_s, 4),
+                      'current_seconds': round(current_s, 4), 'chunked_seconds': round(chunked_s, 4),
+                      'speedup': round(legacy_s / current_s, 1)}, indent=2))
+
+if __name__ == '__main__':
+    main()
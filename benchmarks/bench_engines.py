@@ -0,0 +1,93 @@
+""" Benchmark of the page metrics on the pandas and DuckDB query engines.
+
+    Times the query results behind the page charts (the roll-ups, the fastest / slowest rankings
+    and the orders per time grain and week) on both engines of delish.engines, for one filter
+    state over synthetic orders, and checks that they return the same frames (the fractional means and standard
+    deviations within a relative tolerance, see delish.engines). Needs duckdb installed.
+
+        python -m benchmarks.bench_engines [--sizes 45000 1000000] [--repeat 3]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import json
+import argparse
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic   import synthetic_orders
+from benchmarks.bench_pages import DATE_LIMIT, TRAFFIC_OPTIONS, best_of
+from delish.cube            import build_cube
+from delish.engines         import PandasEngine, DuckDBEngine
+from delish.filters         import OrderFilter
+from delish.cleaning        import clean_dataframe
+from delish.timegrain       import GRAINS
+from delish.incremental     import RunningAggregates
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+RTOL = 1e-9
+
+# group-bys of the page roll-ups, per measure
+ORDER_ROLLUPS = [['Road_traffic_density'], ['City', 'Road_traffic_density'], ['Week_Of_Year']]
+TIME_ROLLUPS = [['Festival'], ['City'], ['City', 'Type_of_order'], ['City', 'Road_traffic_density']]
+RATING_ROLLUPS = [['Road_traffic_density'], ['Weatherconditions']]
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def query_functions(query):
+    """ {name: zero-argument callable returning a list of frames} for the query results the page
+        functions chart (see delish.orders, delish.restaurants and delish.delivery_person).
+    """
+    return {
+        'orders_by_grain': lambda: [query.orders_by_grain(grain) for grain in GRAINS],
+        'weekly_drivers': lambda: [query.weekly_drivers()],
+        'rollup_orders': lambda: [query.rollup(by) for by in ORDER_ROLLUPS],
+        'rollup_time_taken': lambda: [query.rollup(by, 'Time_taken(min)') for by in TIME_ROLLUPS],
+        'rollup_ratings': lambda: [query.rollup(by, 'Delivery_person_Ratings') for by in RATING_ROLLUPS],
+        'top_deliveries': lambda: list(query.top_bottom_n(10, 'City', 'Delivery_person_ID', 'Time_taken(min)')),
+    }
+
+def bench_size(n_rows, repeat, directory):
+    df1 = clean_dataframe(synthetic_orders(n_rows))
+    df_cube = build_cube(df1)
+    aggregates = RunningAggregates.from_frame(df1, df_cube)
+
+    pandas_engine = PandasEngine(OrderFilter(df1, cache_size=0), df_cube, aggregates)
+    build_s, duckdb_engine = best_of(lambda: DuckDBEngine.open(os.path.join(directory, '{}.duckdb'.format(n_rows)), df1, str(n_rows)), 1)
+
+    # the pandas query filters the rows and the cube, the DuckDB one only binds the filters
+    pandas_filter_s, pandas_query = best_of(lambda: pandas_engine.query(DATE_LIMIT, TRAFFIC_OPTIONS), repeat)
+    duckdb_query = duckdb_engine.query(DATE_LIMIT, TRAFFIC_OPTIONS)
+
+    row = {'rows': n_rows, 'duckdb_build_seconds': round(build_s, 4), 'pandas_filter_seconds': round(pandas_filter_s, 4)}
+    pandas_functions, duckdb_functions = query_functions(pandas_query), query_functions(duckdb_query)
+    for name in pandas_functions:
+        pandas_s, expected = best_of(pandas_functions[name], repeat)
+        duckdb_s, result = best_of(duckdb_functions[name], repeat)
+
+        for df_expected, df_result in zip(expected, result):
+            pd.testing.assert_frame_equal(df_result, df_expected, check_exact=False, rtol=RTOL, obj=name)
+
+        row[name] = {'pandas_ms': round(pandas_s * 1000, 3), 'duckdb_ms': round(duckdb_s * 1000, 3)}
+
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(json.dumps([bench_size(n_rows, args.repeat, directory) for n_rows in args.sizes], indent=2))
+
+if __name__ == '__main__':
+    main()
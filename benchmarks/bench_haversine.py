@@ -0,0 +1,89 @@
+""" Micro-benchmark of the delivery distance computation.
+
+    Compares the vectorized delish.geo.haversine_km against the previous row-wise
+    DataFrame.apply + haversine package implementation, and checks that both agree within
+    HAVERSINE_TOLERANCE_KM. The row-wise version is only timed up to --apply-limit rows, it
+    takes minutes beyond that.
+
+        python -m benchmarks.bench_haversine [--sizes 45000 1000000 10000000]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import json
+import time
+import argparse
+
+import numpy  as np
+import pandas as pd
+
+from haversine import haversine
+
+from delish.geo import haversine_km, delivery_distance_km, HAVERSINE_TOLERANCE_KM
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+COLS = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def random_coordinates(n_rows, seed=0):
+    """ Restaurant/delivery pairs spread over India, deliveries within ~20 km of the restaurant. """
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(8, 31, n_rows)
+    lon = rng.uniform(70, 90, n_rows)
+
+    return pd.DataFrame({'Restaurant_latitude': lat,
+                         'Restaurant_longitude': lon,
+                         'Delivery_location_latitude': lat + rng.uniform(-0.15, 0.15, n_rows),
+                         'Delivery_location_longitude': lon + rng.uniform(-0.15, 0.15, n_rows)})
+
+def row_wise_distance(df1):
+    """ The implementation delivery_distance used before, kept for comparison. """
+    return df1.loc[:, COLS].apply(lambda x: haversine((x['Restaurant_latitude'], x['Restaurant_longitude']),
+                                                      (x['Delivery_location_latitude'], x['Delivery_location_longitude']), unit='km'), axis=1)
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000, 10_000_000])
+    parser.add_argument('--apply-limit', type=int, default=45_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.sizes:
+        df1 = random_coordinates(n_rows)
+        vectorized_s, distances = best_of(lambda: delivery_distance_km(df1), args.repeat)
+        row = {'rows': n_rows, 'vectorized_seconds': round(vectorized_s, 4)}
+
+        if n_rows <= args.apply_limit:
+            apply_s, expected = best_of(lambda: row_wise_distance(df1), 1)
+            max_error = float(np.max(np.abs(distances - expected.to_numpy())))
+            assert max_error <= HAVERSINE_TOLERANCE_KM, max_error
+
+            row.update(apply_seconds=round(apply_s, 4), speedup=round(apply_s / vectorized_s, 1), max_abs_error_km=max_error)
+
+        results.append(row)
+
+    # accuracy check on an independent sample, so it also runs when --sizes skips the small sizes
+    sample = random_coordinates(1_000, seed=1)
+    sample_error = np.max(np.abs(haversine_km(*(sample[c] for c in COLS)) - row_wise_distance(sample).to_numpy()))
+
+    print(json.dumps({'tolerance_km': HAVERSINE_TOLERANCE_KM, 'sample_max_abs_error_km': float(sample_error), 'runs': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
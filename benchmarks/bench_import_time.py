@@ -0,0 +1,101 @@
+""" Import-time budget of the page scripts, measured with `python -X importtime`.
+
+    For every page, the top-level import statements of the script (and only those, no data is
+    loaded and nothing is rendered) run in a fresh interpreter with -X importtime. Streamlit
+    itself is measured the same way first, and the page is charged only for the modules
+    streamlit does not already import, which is the start-up cost the page adds on top of the
+    server. The script prints the report as JSON and exits with status 1 when a page goes over
+    --budget-ms or adds one of the DEFERRED modules, which must only load when the section that
+    needs them renders (see delish.lazy).
+
+        python -m benchmarks.bench_import_time [pages/*.py] [--budget-ms 150] [--repeat 3]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import ast
+import sys
+import glob
+import json
+import argparse
+import subprocess
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# plotting and mapping libraries the page headers must not import
+DEFERRED = ['folium', 'branca', 'plotly.express', 'streamlit_folium', 'haversine', 'matplotlib.pyplot']
+
+BASELINE_IMPORTS = 'import streamlit'
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def header_imports(path):
+    """ Source of the top-level import statements of a script. """
+    with open(path) as f:
+        source = f.read()
+
+    tree = ast.parse(source)
+    statements = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+    return '\n'.join(ast.get_source_segment(source, node) for node in statements)
+
+def import_times(code):
+    """ {module: self import time in microseconds} for running `code` in a fresh interpreter. """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            cwd=os.getcwd(), env={**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')]))})
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = times.get(name.strip(), 0) + int(self_us)
+
+    return times
+
+def best_times(code, repeat):
+    """ Per-module minimum over `repeat` fresh interpreters (the first runs warm the disk cache). """
+    runs = [import_times(code) for _ in range(repeat)]
+
+    return {module: min(run.get(module, 0) for run in runs) for module in runs[0]}
+
+def page_report(path, baseline, repeat):
+    times = best_times(header_imports(path), repeat)
+    extra = {module: us for module, us in times.items() if module not in baseline}
+
+    return {'extra_ms': round(sum(extra.values()) / 1000, 1),
+            'extra_modules': len(extra),
+            'slowest': {module: round(us / 1000, 1) for module, us in sorted(extra.items(), key=lambda item: -item[1])[:8]},
+            'deferred_imported': [module for module in DEFERRED if module in extra]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('pages', nargs='*')
+    parser.add_argument('--budget-ms', type=float, default=150)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(glob.glob('pages/*.py'))
+    baseline = best_times(BASELINE_IMPORTS, args.repeat)
+
+    report = {'streamlit_ms': round(sum(baseline.values()) / 1000, 1), 'budget_ms': args.budget_ms,
+              'pages': {path: page_report(path, baseline, args.repeat) for path in pages}}
+
+    failures = [path for path, page in report['pages'].items()
+                if page['extra_ms'] > args.budget_ms or page['deferred_imported']]
+    report['over_budget'] = failures
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+""" Peak memory of a Delivery Person page rerun, against the size of the cached frame.
+
+    Traces (tracemalloc, which sees the numpy buffers behind pandas) one rerun of the page
+    computations: the sidebar filters, the headline KPIs, the ratings tables and the fastest /
+    slowest rankings, for every traffic subset of the filter grid at the last date cutoff. The
+    filter engine keeps its production cache, so the memory it still holds after all the
+    reruns is reported too. The base size is the deep memory usage of the cleaned frame the
+    pages share. The script prints the report as JSON and exits with status 1 when a rerun
+    peaks, or the retained memory grows, above --max-ratio times the base size.
+
+        python -m benchmarks.bench_memory [--sizes 45000 1000000] [--max-ratio 0.5]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import sys
+import json
+import argparse
+import tracemalloc
+
+from benchmarks.synthetic   import synthetic_orders
+from delish.cube            import filter_cube
+from delish.kpis            import filter_state_kpis
+from delish.filters         import OrderFilter
+from delish.spatial         import SpatialIndex
+from delish.cleaning        import clean_dataframe
+from delish.precompute      import traffic_subsets
+from delish.incremental     import RunningAggregates
+from delish.delivery_person import PAGE_COLUMNS, top_deliveries, delivery_person_ratings, ratings_by_traffic, ratings_by_weather
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def page_rerun(order_filter, spatial, df_cube, aggregates, date_limit, traffic_options):
+    """ The computations of one Delivery Person page rerun, without the state caches. """
+    df1 = order_filter.select(date_limit, traffic_options, PAGE_COLUMNS)
+    df_cube = filter_cube(df_cube, date_limit, traffic_options)
+    valid = spatial.valid_rows(order_filter.select_positions(date_limit, traffic_options))
+
+    return (filter_state_kpis(df1, df_cube, aggregates, date_limit, traffic_options, valid),
+            delivery_person_ratings(df1), ratings_by_traffic(df_cube), ratings_by_weather(df_cube), top_deliveries(df1))
+
+def traced_bytes(functions):
+    """ {name: peak traced allocation while fn runs} for {name: fn} run in turn, and the bytes
+        still allocated after the last one (what the caches retained), in bytes.
+    """
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for name, fn in functions.items():
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            fn()
+            peaks[name] = tracemalloc.get_traced_memory()[1] - start
+
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peaks, retained
+
+def bench_size(n_rows):
+    df1 = clean_dataframe(synthetic_orders(n_rows))
+    aggregates = RunningAggregates.from_frame(df1)
+    df_cube = aggregates.cube()
+
+    order_filter = OrderFilter(df1)
+    base_bytes = int(order_filter.df1.memory_usage(deep=True).sum())
+    date_limit = order_filter.df1['Order_Date'].max()
+    spatial = SpatialIndex(order_filter.df1)
+
+    # warm-up (lazy imports, pandas caches), at a date cutoff the measured states don't use
+    page_rerun(order_filter, spatial, df_cube, aggregates, order_filter.df1['Order_Date'].min(), traffic_subsets()[0])
+
+    peaks, retained = traced_bytes({'+'.join(options): (lambda options=options: page_rerun(order_filter, spatial, df_cube, aggregates, date_limit, options))
+                                    for options in traffic_subsets()})
+
+    return {'rows': n_rows, 'base_mb': round(base_bytes / 2 ** 20, 1), 'max_peak_mb': round(max(peaks.values()) / 2 ** 20, 1),
+            'max_ratio': round(max(peaks.values()) / base_bytes, 3), 'worst_state': max(peaks, key=peaks.get),
+            'retained_mb': round(retained / 2 ** 20, 1), 'retained_ratio': round(retained / base_bytes, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000])
+    parser.add_argument('--max-ratio', type=float, default=0.5)
+    args = parser.parse_args()
+
+    report = {'max_ratio': args.max_ratio, 'sizes': [bench_size(n_rows) for n_rows in args.sizes]}
+    report['over_budget'] = [size['rows'] for size in report['sizes'] if max(size['max_ratio'], size['retained_ratio']) > args.max_ratio]
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['over_budget'] else 0)
+
+if __name__ == '__main__':
+    main()
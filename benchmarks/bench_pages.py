@@ -0,0 +1,143 @@
+""" Timings of the dashboard hot paths on synthetic orders, reported as JSON.
+
+    For every size the raw orders come from benchmarks.synthetic. The script times the cleaning,
+    the per-dataset builds (filter index, cube, running aggregates), the sidebar filters and
+    every page function for one representative sidebar state (a mid-range date and three
+    traffic conditions). Each timing is the best of --repeat runs, in seconds.
+
+        python -m benchmarks.bench_pages [--sizes 45000 1000000 10000000] [--out results.json]
+                                         [--baseline previous.json]
+
+    With --baseline, every timing is also reported as a ratio to the same entry of an earlier
+    run (above 1 means slower), so regressions show up in a diff of two runs.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import sys
+import json
+import time
+import argparse
+import platform
+
+import numpy  as np
+import pandas as pd
+
+from benchmarks.synthetic   import synthetic_orders
+from delish.cube            import build_cube, filter_cube
+from delish.kpis            import compute_kpis
+from delish.engines         import PandasQuery
+from delish.filters         import OrderFilter
+from delish.cleaning        import clean_dataframe
+from delish.incremental     import RunningAggregates
+from delish.timegrain       import GRAINS
+from delish.orders          import orders_by_grain, traffic_orders_share, order_city_traffic, orders_by_week, orders_driver_weekly
+from delish.restaurants     import (delivery_distance, festival_time_delivery_avg_std, delivery_city_avg_std,
+                                    delivery_city_order_avg_std, delivery_city_traffic_avg_std)
+from delish.delivery_person import top_deliveries, delivery_person_ratings, ratings_by_traffic, ratings_by_weather
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+DATE_LIMIT = pd.Timestamp(2022, 3, 20)
+TRAFFIC_OPTIONS = ['Low', 'Medium', 'High']
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), result
+
+def page_functions(df1, df_cube, aggregates):
+    """ {name: zero-argument callable} for every page function, on already filtered inputs. """
+    query = PandasQuery(DATE_LIMIT, TRAFFIC_OPTIONS, df1, df_cube, aggregates)
+
+    return {
+        'orders_by_grain': lambda: [orders_by_grain(query, grain) for grain in GRAINS],
+        'traffic_orders_share': lambda: traffic_orders_share(df_cube),
+        'order_city_traffic': lambda: order_city_traffic(df_cube),
+        'orders_by_week': lambda: orders_by_week(df_cube),
+        'orders_driver_weekly': lambda: orders_driver_weekly(query),
+        'top_deliveries': lambda: top_deliveries(df1),
+        'delivery_person_ratings': lambda: delivery_person_ratings(df1),
+        'ratings_by_traffic': lambda: ratings_by_traffic(df_cube),
+        'ratings_by_weather': lambda: ratings_by_weather(df_cube),
+        'delivery_distance': lambda: (delivery_distance(df1, fig=False), delivery_distance(df1, fig=True)),
+        'festival_time_delivery_avg_std': lambda: [festival_time_delivery_avg_std(df_cube, festival, op)
+                                                   for festival in ('Yes', 'No') for op in ('avg_time', 'std_time')],
+        'compute_kpis': lambda: compute_kpis(df1, df_cube),
+        'delivery_city_avg_std': lambda: delivery_city_avg_std(df_cube),
+        'delivery_city_order_avg_std': lambda: delivery_city_order_avg_std(df_cube),
+        'delivery_city_traffic_avg_std': lambda: delivery_city_traffic_avg_std(df_cube),
+    }
+
+def bench_size(n_rows, repeat, seed=0):
+    """ Row counts and {timing name: seconds} for one dataset size. """
+    raw = synthetic_orders(n_rows, seed)
+    timings = {}
+
+    timings['clean_dataframe'], df1 = best_of(lambda: clean_dataframe(raw), repeat)
+    del raw
+
+    # per-dataset builds, paid once per process (or per store append)
+    timings['build_filter'], order_filter = best_of(lambda: OrderFilter(df1, cache_size=0), repeat)
+    timings['build_cube'], df_cube = best_of(lambda: build_cube(df1), repeat)
+    timings['build_aggregates'], aggregates = best_of(lambda: RunningAggregates.from_frame(df1, df_cube), repeat)
+
+    # sidebar filters, with the memoization disabled so every run does the work
+    timings['filter_rows'], df_filtered = best_of(lambda: order_filter.select(DATE_LIMIT, TRAFFIC_OPTIONS), repeat)
+    timings['filter_rows_all_traffic'], _ = best_of(lambda: order_filter.select(DATE_LIMIT, ['Low', 'Medium', 'High', 'Jam']), repeat)
+    timings['filter_cube'], cube_filtered = best_of(lambda: filter_cube(df_cube, DATE_LIMIT, TRAFFIC_OPTIONS), repeat)
+
+    for name, fn in page_functions(df_filtered, cube_filtered, aggregates).items():
+        timings[name], _ = best_of(fn, repeat)
+
+    return {'rows_in': n_rows, 'rows_out': len(df1), 'rows_filtered': len(df_filtered), 'cube_rows': len(df_cube),
+            'seconds': {name: round(seconds, 6) for name, seconds in timings.items()}}
+
+def compare(results, baseline):
+    """ Adds, per size, the ratio of every timing to the same timing of a baseline run. """
+    for size, result in results.items():
+        previous = baseline.get('results', {}).get(size, {}).get('seconds', {})
+        result['vs_baseline'] = {name: round(seconds / previous[name], 2)
+                                 for name, seconds in result['seconds'].items() if previous.get(name)}
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='also write the report to this file')
+    parser.add_argument('--baseline', help='report of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = {str(n_rows): bench_size(n_rows, args.repeat, args.seed) for n_rows in args.sizes}
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results = compare(results, json.load(f))
+
+    report = {'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                              'machine': platform.machine(), 'argv': sys.argv[1:]},
+              'results': results}
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + '\n')
+
+    print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+""" Benchmark of the page sections computed in sequence and concurrently.
+
+    Submits every page function of benchmarks.bench_pages (on the same filtered inputs) as the
+    tasks of one delish.sections.SectionRun, once computed in the calling thread (0 workers,
+    the pages' sequential behaviour) and once on a pool of --workers threads, and reports the
+    wall time of the whole rerun and the per-task timings of the concurrent one. The gain
+    depends on how many cores the machine has and how much of each task releases the GIL.
+
+        python -m benchmarks.bench_sections [--sizes 45000 1000000] [--workers 4]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import json
+import time
+import argparse
+
+from benchmarks.synthetic   import synthetic_orders
+from benchmarks.bench_pages import DATE_LIMIT, TRAFFIC_OPTIONS, page_functions
+from delish.cube            import build_cube, filter_cube
+from delish.filters         import OrderFilter
+from delish.cleaning        import clean_dataframe
+from delish.sections        import SectionRun
+from delish.incremental     import RunningAggregates
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def rerun(functions, workers):
+    """ Wall time of one rerun computing every function as a section task, and its run. """
+    start = time.perf_counter()
+
+    run = SectionRun.start({}, workers=workers)
+    tasks = [run.submit(name, fn) for name, fn in functions.items()]
+    for task in tasks:
+        task.result()
+
+    return time.perf_counter() - start, run
+
+def bench_size(n_rows, workers, repeat):
+    df1 = clean_dataframe(synthetic_orders(n_rows))
+    df_cube = build_cube(df1)
+    aggregates = RunningAggregates.from_frame(df1, df_cube)
+
+    df_filtered = OrderFilter(df1, cache_size=0).select(DATE_LIMIT, TRAFFIC_OPTIONS)
+    functions = page_functions(df_filtered, filter_cube(df_cube, DATE_LIMIT, TRAFFIC_OPTIONS), aggregates)
+
+    # warm-up (lazy imports, pandas caches)
+    rerun(functions, 0)
+
+    sequential_s = min(rerun(functions, 0)[0] for _ in range(repeat))
+    concurrent = min((rerun(functions, workers) for _ in range(repeat)), key=lambda result: result[0])
+
+    return {'rows': n_rows, 'workers': workers, 'cpus': os.cpu_count(), 'sequential_seconds': round(sequential_s, 4),
+            'concurrent_seconds': round(concurrent[0], 4), 'speedup': round(sequential_s / concurrent[0], 2),
+            'tasks': {task.section: {'wall_s': round(task.wall_s, 4), 'cpu_s': round(task.cpu_s, 4)} for task in concurrent[1].tasks}}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps([bench_size(n_rows, args.workers, args.repeat) for n_rows in args.sizes], indent=2))
+
+if __name__ == '__main__':
+    main()
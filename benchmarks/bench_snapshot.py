@@ -0,0 +1,76 @@
+""" Cold-start benchmark: csv parse + clean vs. the columnar snapshot.
+
+    Every measurement runs in a fresh interpreter, so it includes nothing that a previous run
+    left in memory. Reports wall time of the load and the peak RSS of the process.
+
+        python -m benchmarks.bench_snapshot [data/train.csv] [--repeat 5]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import sys
+import json
+import argparse
+import subprocess
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# each snippet runs in a new process; the imports are done before the clock starts
+CHILD = """
+import json, time, resource
+import pandas as pd
+from delish.cleaning import clean_dataframe
+from delish.snapshot import snapshot_path, read_snapshot
+
+rss_imports = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'rows': len(df1),
+                   'rss_imports_kb': rss_imports,
+                   'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+LOADS = {
+    'csv': "df1 = clean_dataframe(pd.read_csv({path!r}))",
+    'snapshot': "df1 = read_snapshot(snapshot_path({path!r}))",
+}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def cold_start(mode, path):
+    code = CHILD.format(load=LOADS[mode].format(path=path))
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('path', nargs='?', default='data/train.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # make sure the snapshot exists and is fresh before timing it
+    from delish.loader import build_orders, file_stat
+    build_orders(args.path, file_stat(args.path))
+
+    results = {}
+    for mode in LOADS:
+        runs = [cold_start(mode, args.path) for _ in range(args.repeat)]
+        results[mode] = {
+            'rows': runs[0]['rows'],
+            'best_seconds': round(min(r['seconds'] for r in runs), 4),
+            'peak_rss_mb': round(max(r['peak_rss_kb'] for r in runs) / 1024, 1),
+            'load_rss_mb': round(max(r['peak_rss_kb'] - r['rss_imports_kb'] for r in runs) / 1024, 1),
+        }
+
+    results['speedup'] = round(results['csv']['best_seconds'] / results['snapshot']['best_seconds'], 1)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
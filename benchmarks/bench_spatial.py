@@ -0,0 +1,87 @@
+""" Benchmark of the spatial grid index against full scans.
+
+    Builds delish.spatial.SpatialIndex over synthetic orders and times a bounding-box query, an
+    "orders within a radius of a restaurant" query and the region density, each against the
+    full-scan equivalent (which re-checks the coordinate flags on every row), and checks that
+    both return the same orders.
+
+        python -m benchmarks.bench_spatial [--sizes 45000 1000000] [--queries 50]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import json
+import argparse
+
+import numpy as np
+
+from benchmarks.synthetic  import synthetic_orders
+from benchmarks.bench_pages import best_of
+from delish.geo      import haversine_km
+from delish.spatial  import SpatialIndex, coordinate_flags
+from delish.cleaning import clean_dataframe
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+BBOX_DEGREES = 0.2
+RADIUS_KM = 5
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def scan_bbox(df1, lat_min, lat_max, lon_min, lon_max):
+    lat = df1['Delivery_location_latitude'].to_numpy()
+    lon = df1['Delivery_location_longitude'].to_numpy()
+
+    return np.flatnonzero((coordinate_flags(df1) == 0) & (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+
+def scan_radius(df1, lat, lon, radius_km):
+    distance = haversine_km(lat, lon, df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
+
+    return np.flatnonzero((coordinate_flags(df1) == 0) & (distance <= radius_km))
+
+def bench_size(n_rows, n_queries, repeat):
+    df1 = clean_dataframe(synthetic_orders(n_rows)).reset_index(drop=True)
+
+    build_s, index = best_of(lambda: SpatialIndex(df1), repeat)
+
+    # query around restaurants of valid orders
+    rng = np.random.default_rng(0)
+    centers = df1.loc[rng.choice(np.flatnonzero(index.flags == 0), n_queries), ['Restaurant_latitude', 'Restaurant_longitude']].to_numpy()
+
+    row = {'rows': n_rows, 'build_seconds': round(build_s, 4), 'queries': n_queries}
+    for name, indexed, scanned in [
+        ('bbox', lambda lat, lon: index.bbox(lat - BBOX_DEGREES / 2, lat + BBOX_DEGREES / 2, lon - BBOX_DEGREES / 2, lon + BBOX_DEGREES / 2),
+                 lambda lat, lon: scan_bbox(df1, lat - BBOX_DEGREES / 2, lat + BBOX_DEGREES / 2, lon - BBOX_DEGREES / 2, lon + BBOX_DEGREES / 2)),
+        ('radius', lambda lat, lon: index.orders_near_restaurant(lat, lon, RADIUS_KM),
+                   lambda lat, lon: scan_radius(df1, lat, lon, RADIUS_KM))]:
+
+        indexed_s, indexed_results = best_of(lambda: [indexed(lat, lon) for lat, lon in centers], repeat)
+        scan_s, scan_results = best_of(lambda: [scanned(lat, lon) for lat, lon in centers[:max(n_queries // 10, 1)]], 1)
+        assert all(np.array_equal(a, b) for a, b in zip(indexed_results, scan_results)), name
+
+        indexed_ms = indexed_s / n_queries * 1000
+        scan_ms = scan_s / max(n_queries // 10, 1) * 1000
+        row[name] = {'indexed_ms': round(indexed_ms, 3), 'scan_ms': round(scan_ms, 3), 'speedup': round(scan_ms / indexed_ms, 1),
+                     'mean_orders': round(float(np.mean([len(result) for result in indexed_results])), 1)}
+
+    density_s, _ = best_of(lambda: index.density(), repeat)
+    row['density_ms'] = round(density_s * 1000, 3)
+
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[45_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps([bench_size(n_rows, args.queries, args.repeat) for n_rows in args.sizes], indent=2))
+
+if __name__ == '__main__':
+    main()
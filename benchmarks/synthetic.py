@@ -0,0 +1,147 @@
+""" Synthetic raw orders with the schema of data/train.csv, at any size.
+
+    The frame has the same columns, text formats and missing-value markers as the raw export
+    (trailing blanks, 'NaN ' sentinels, 'conditions X' weather, '(min) xx' delivery times,
+    dd-mm-yyyy dates in the dashboard date range), i.e. what pd.read_csv returns for it, so it
+    goes through clean_dataframe like the real file. Every column is drawn from a small vocabulary
+    with numpy, which keeps 10M rows in the tens of seconds.
+
+        python -m benchmarks.synthetic 1000000 data/synthetic_1m.csv [--seed 0]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import argparse
+
+import numpy  as np
+import pandas as pd
+
+from delish.cleaning import NA_SENTINEL
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+CITY_WEIGHTS = [0.75, 0.22, 0.03]
+TRAFFIC = ['Low ', 'Medium ', 'High ', 'Jam ']
+WEATHER = ['conditions Sunny', 'conditions Stormy', 'conditions Sandstorms', 'conditions Cloudy',
+           'conditions Fog', 'conditions Windy', 'conditions NaN']
+ORDER_TYPES = ['Snack ', 'Drinks ', 'Buffet ', 'Meal ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+RATINGS = ['4.9', '4.5', '4.7', '5', '3.5', '4.1', '4.8', '4.6', '4.2', '4.3', '4.4', '4', '2.5', '1']
+REGIONS = ['INDO', 'BANG', 'COIMB', 'CHEN', 'HYD', 'RANCHI', 'MYS', 'DEH', 'KOC', 'PUNE', 'JAP',
+           'SUR', 'MUM', 'AGR', 'VAD', 'KNP', 'LUDH', 'KOL', 'ALH', 'GOA', 'AURG', 'BHP']
+
+# the dashboard date slider range
+FIRST_DAY = '2022-02-11'
+LAST_DAY = '2022-04-06'
+
+# share of rows with a 'NaN ' sentinel in each column that can hold one
+NA_RATE = 0.01
+
+# the real export has about one delivery person per 34 orders
+ORDERS_PER_DRIVER = 34
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def driver_ids(n_drivers):
+    """ n_drivers ids in the export format, e.g. 'INDORES13DEL02 ' (region, restaurant, slot). """
+    n_restaurants = -(-n_drivers // (len(REGIONS) * 3))
+
+    ids = ['{}RES{:02d}DEL{:02d} '.format(region, restaurant, slot)
+           for restaurant in range(1, n_restaurants + 1) for region in REGIONS for slot in range(1, 4)]
+
+    return np.array(ids[:n_drivers], dtype=object)
+
+def pick(rng, vocabulary, n_rows, p=None):
+    """ n_rows values drawn from a vocabulary, as an object array of the vocabulary strings. """
+    return np.array(vocabulary, dtype=object)[rng.choice(len(vocabulary), n_rows, p=p)]
+
+def with_sentinel(rng, values, rate=NA_RATE):
+    """ Replaces a random share of the values with the raw export missing-value marker. """
+    values = values.astype(object)
+    values[rng.random(len(values)) < rate] = NA_SENTINEL
+
+    return values
+
+def synthetic_orders(n_rows, seed=0):
+    """
+        Raw orders, as pd.read_csv returns them for an export of n_rows lines.
+
+        Parameters
+        ----------
+            Input:
+                n_rows: number of orders
+                seed: random seed, the same seed always gives the same frame
+
+            Output:
+                Dataframe with the 20 columns of data/train.csv
+
+    """
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range(FIRST_DAY, LAST_DAY).strftime('%d-%m-%Y').to_numpy(dtype=object)
+    clock = np.array(['{:02d}:{:02d}:00'.format(hour, minute) for hour in range(24) for minute in range(0, 60, 5)], dtype=object)
+    minutes = np.array(['(min) {}'.format(minute) for minute in range(10, 55)], dtype=object)
+    ages = np.array([str(age) for age in range(20, 40)], dtype=object)
+
+    restaurant_lat = rng.uniform(9, 31, n_rows)
+    restaurant_lon = rng.uniform(72, 88, n_rows)
+
+    # a few restaurants with the sign flipped or (0, 0) coordinates, as in the real export
+    restaurant_lat[rng.random(n_rows) < 0.02] *= -1
+    placeholder = rng.random(n_rows) < 0.01
+    restaurant_lat[placeholder] = 0
+    restaurant_lon[placeholder] = 0
+
+    drivers = driver_ids(max(n_rows // ORDERS_PER_DRIVER, 1))
+
+    # the age and rating of a delivery person are missing together
+    age = ages[rng.integers(0, len(ages), n_rows)]
+    ratings = pick(rng, RATINGS, n_rows)
+    age_missing = rng.random(n_rows) < NA_RATE
+    age[age_missing] = NA_SENTINEL
+    ratings[age_missing] = NA_SENTINEL
+
+    return pd.DataFrame({
+        'ID': pd.Index(np.arange(n_rows)).map('0x{:04x} '.format).to_numpy(dtype=object),
+        'Delivery_person_ID': drivers[rng.integers(0, len(drivers), n_rows)],
+        'Delivery_person_Age': age,
+        'Delivery_person_Ratings': ratings,
+        'Restaurant_latitude': restaurant_lat,
+        'Restaurant_longitude': restaurant_lon,
+        'Delivery_location_latitude': np.abs(restaurant_lat) + rng.uniform(-0.15, 0.15, n_rows),
+        'Delivery_location_longitude': restaurant_lon + rng.uniform(-0.15, 0.15, n_rows),
+        'Order_Date': dates[rng.integers(0, len(dates), n_rows)],
+        'Time_Orderd': with_sentinel(rng, clock[rng.integers(96, len(clock), n_rows)]),
+        'Time_Order_picked': clock[rng.integers(96, len(clock), n_rows)],
+        'Weatherconditions': pick(rng, WEATHER, n_rows, p=[0.165] * 6 + [0.01]),
+        'Road_traffic_density': with_sentinel(rng, pick(rng, TRAFFIC, n_rows, p=[0.34, 0.24, 0.1, 0.32])),
+        'Vehicle_condition': rng.integers(0, 4, n_rows),
+        'Type_of_order': pick(rng, ORDER_TYPES, n_rows),
+        'Type_of_vehicle': pick(rng, VEHICLES, n_rows, p=[0.58, 0.33, 0.08, 0.01]),
+        'multiple_deliveries': with_sentinel(rng, pick(rng, ['0', '1', '2', '3'], n_rows, p=[0.31, 0.62, 0.05, 0.02])),
+        'Festival': with_sentinel(rng, pick(rng, ['No ', 'Yes '], n_rows, p=[0.98, 0.02])),
+        'City': with_sentinel(rng, pick(rng, CITIES, n_rows, p=CITY_WEIGHTS)),
+        'Time_taken(min)': minutes[rng.integers(0, len(minutes), n_rows)],
+    })
+
+# ======================================================================================================
+# COMMAND LINE
+# ======================================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    synthetic_orders(args.rows, args.seed).to_csv(args.path, index=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+""" Shared building blocks for the Delish Express dashboard pages. """
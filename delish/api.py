@@ -0,0 +1,350 @@
+""" Headless JSON API of the dashboard metrics, for clients that need the numbers and not the pages.
+
+    Serves the tables and headline metrics of the Orders, Delivery Person and Restaurants pages
+    for a date cutoff and a set of traffic conditions (the sidebar filters), computed by the
+    same page functions (their fig=False tables) over the same cached dataset, query engine and
+    per filter state caches as the pages:
+
+        python -m delish.api [--host 127.0.0.1] [--port 8502] [--workers 8] [--cache-size 256]
+
+        GET /orders?date=2022-03-20&traffic=Low,High&grain=Week
+        GET /delivery-person?date=2022-03-20&traffic=Jam&search=BANG&sort=rating_desc&page=2
+        GET /restaurants?traffic=Low,Medium,High,Jam
+        GET /health
+
+    date is the exclusive cutoff (YYYY-MM-DD, default the sidebar default) and traffic a comma
+    separated subset of Low, Medium, High and Jam (default all of them, empty for none).
+    Responses are cached in a bounded LRU keyed on the dataset version and the normalized
+    parameters (so ?traffic=High,Low and ?traffic=low,high share an entry) and carry an ETag;
+    a request with a matching If-None-Match gets 304 Not Modified without a body. Requests are
+    handled concurrently by a pool of worker threads.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import datetime
+
+from http.server        import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse       import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy  as np
+import pandas as pd
+
+from delish.kpis            import filter_state_kpis
+from delish.cache           import LRUCache
+from delish.loader          import DATA_PATH, dataset_digest, load_filter, load_engine, load_spatial, load_aggregates, load_state_cache
+from delish.orders          import orders_by_grain, traffic_orders_share, order_city_traffic, orders_by_week, orders_driver_weekly
+from delish.filters         import filter_key
+from delish.artifacts       import TRAFFIC_ORDER
+from delish.timegrain       import GRAINS
+from delish.restaurants     import delivery_city_avg_std, delivery_city_order_avg_std, delivery_city_traffic_avg_std
+from delish.delivery_person import PAGE_SIZE, DRIVER_SORTS, build_driver_table, top_deliveries, ratings_by_traffic, ratings_by_weather
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+API_WORKERS = int(os.environ.get('DELISH_API_WORKERS', 8))
+API_CACHE_SIZE = int(os.environ.get('DELISH_API_CACHE_SIZE', 256))
+
+# the sidebar's default date cutoff
+DEFAULT_DATE = '2022-04-06'
+
+MAX_PAGE_SIZE = 500
+
+# parameters of every endpoint, besides date and traffic
+ENDPOINT_PARAMS = {'/orders': ['grain'], '/delivery-person': ['search', 'sort', 'page', 'page_size'], '/restaurants': []}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def single(params, name, default):
+    """ The value of a query parameter given at most once. """
+    values = params.get(name, [default])
+    if len(values) > 1:
+        raise BadRequest('{} given more than once'.format(name))
+
+    return values[0]
+
+def parse_date(value):
+    """ A YYYY-MM-DD calendar date as a naive pd.Timestamp at midnight, like Order_Date; anything
+        else (empty, a time, a timezone, 'now') is a BadRequest.
+    """
+    try:
+        date = datetime.datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        date = None
+
+    if date is None or date.strftime('%Y-%m-%d') != value:
+        raise BadRequest('date must be YYYY-MM-DD, got {!r}'.format(value))
+
+    return pd.Timestamp(date)
+
+def positive_int(value, name, maximum=None):
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest('{} must be an integer, got {!r}'.format(name, value)) from None
+
+    if number < 1 or (maximum is not None and number > maximum):
+        raise BadRequest('{} must be between 1 and {}'.format(name, maximum) if maximum else '{} must be positive'.format(name))
+
+    return number
+
+def normalize_params(endpoint, query_string):
+    """
+        Validates the query parameters of an endpoint and returns them in canonical form.
+
+        Parameters
+        ----------
+            Input:
+                endpoint: one of ENDPOINT_PARAMS
+                query_string: raw query string of the request
+
+            Output:
+                dict with 'date' (pd.Timestamp at midnight), 'traffic' (tuple in TRAFFIC_ORDER,
+                without duplicates) and the endpoint's own parameters, defaults filled in
+
+    """
+    params = parse_qs(query_string, keep_blank_values=True)
+
+    unknown = set(params) - {'date', 'traffic'} - set(ENDPOINT_PARAMS[endpoint])
+    if unknown:
+        raise BadRequest('unknown parameters: {}'.format(', '.join(sorted(unknown))))
+
+    date = parse_date(single(params, 'date', DEFAULT_DATE))
+
+    traffic = {option.strip().lower() for option in single(params, 'traffic', ','.join(TRAFFIC_ORDER)).split(',') if option.strip()}
+    unknown = traffic - {option.lower() for option in TRAFFIC_ORDER}
+    if unknown:
+        raise BadRequest('traffic must be a subset of {}, got {}'.format(', '.join(TRAFFIC_ORDER), ', '.join(sorted(unknown))))
+
+    normalized = {'date': date, 'traffic': tuple(option for option in TRAFFIC_ORDER if option.lower() in traffic)}
+
+    if endpoint == '/orders':
+        grains = {grain.lower(): grain for grain in GRAINS}
+        grain = single(params, 'grain', 'Day')
+        if grain.lower() not in grains:
+            raise BadRequest('grain must be one of {}, got {!r}'.format(', '.join(GRAINS), grain))
+        normalized['grain'] = grains[grain.lower()]
+
+    elif endpoint == '/delivery-person':
+        sort = single(params, 'sort', 'id')
+        if sort not in DRIVER_SORTS.values():
+            raise BadRequest('sort must be one of {}, got {!r}'.format(', '.join(DRIVER_SORTS.values()), sort))
+
+        normalized.update(search=single(params, 'search', '').strip(), sort=sort,
+                          page=positive_int(single(params, 'page', '1'), 'page'),
+                          page_size=positive_int(single(params, 'page_size', str(PAGE_SIZE)), 'page_size', MAX_PAGE_SIZE))
+
+    return normalized
+
+def records(df1):
+    """ Rows of a table as JSON-ready dicts (missing values as null, timestamps in ISO 8601). """
+    return json.loads(df1.reset_index(drop=not df1.index.name).to_json(orient='records', date_format='iso'))
+
+def json_default(value):
+    """ json.dumps fallback for the numpy and pandas scalars of the metrics. """
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+def filter_context(path, params):
+    """ Filtered rows, query of the configured engine, mask of the rows with valid coordinates
+        and filter state key of a request, as the pages compute them.
+    """
+    date, traffic = params['date'], list(params['traffic'])
+    order_filter = load_filter(path)
+
+    df1 = order_filter.select(date, traffic)
+    query = load_engine(path).query(date, traffic, df1)
+    valid = load_spatial(path).valid_rows(order_filter.select_positions(date, traffic))
+
+    return df1, query, valid, filter_key(date, traffic)
+
+def orders_metrics(path, params):
+    _, query, _, _ = filter_context(path, params)
+
+    return {'orders_by_grain': records(orders_by_grain(query, params['grain'], fig=False)),
+            'traffic_orders_share': records(traffic_orders_share(query, fig=False)),
+            'order_city_traffic': records(order_city_traffic(query, fig=False)),
+            'orders_by_week': records(orders_by_week(query, fig=False)),
+            'orders_driver_weekly': records(orders_driver_weekly(query, fig=False))}
+
+def delivery_person_metrics(path, params):
+    df1, query, valid, state = filter_context(path, params)
+    date, traffic = params['date'], list(params['traffic'])
+
+    kpis = load_state_cache('kpis', path).get_or_compute(state, lambda: filter_state_kpis(df1, query, load_aggregates(path), date, traffic, valid))
+    driver_table = load_state_cache('drivers', path).get_or_compute(state, lambda: build_driver_table(df1))
+    df_fastest, df_slowest = load_state_cache('rankings', path).get_or_compute(state, lambda: top_deliveries(query))
+
+    df_drivers, total = driver_table.page(params['search'], params['sort'], params['page'], params['page_size'])
+
+    return {'kpis': {name: getattr(kpis, name) for name in ('maximum_age', 'minimum_age', 'best_vehicle_condition', 'worst_vehicle_condition')},
+            'driver_ratings': {'total': total, 'page': params['page'], 'page_size': params['page_size'], 'rows': records(df_drivers)},
+            'ratings_by_traffic': records(ratings_by_traffic(query)),
+            'ratings_by_weather': records(ratings_by_weather(query)),
+            'fastest_deliveries': records(df_fastest),
+            'slowest_deliveries': records(df_slowest)}
+
+def restaurants_metrics(path, params):
+    df1, query, valid, state = filter_context(path, params)
+    date, traffic = params['date'], list(params['traffic'])
+
+    kpis = load_state_cache('kpis', path).get_or_compute(state, lambda: filter_state_kpis(df1, query, load_aggregates(path), date, traffic, valid))
+
+    return {'kpis': {name: getattr(kpis, name) for name in ('unique_deliverers', 'avg_distance_km', 'festival_avg_time',
+                                                            'festival_std_time', 'avg_time', 'std_time')},
+            'delivery_city_avg_std': records(delivery_city_avg_std(query, fig=False)),
+            'delivery_city_order_avg_std': records(delivery_city_order_avg_std(query)),
+            'delivery_city_traffic_avg_std': records(delivery_city_traffic_avg_std(query, fig=False))}
+
+ENDPOINTS = {'/orders': orders_metrics, '/delivery-person': delivery_person_metrics, '/restaurants': restaurants_metrics}
+
+def etag_matches(header, etag):
+    """ Whether an If-None-Match header value matches the ETag (weak comparison, as for GET). """
+    if header is None:
+        return False
+
+    tags = [tag.strip() for tag in header.split(',')]
+
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class BadRequest(ValueError):
+    """ Invalid query parameters, answered with 400. """
+
+class MetricsApi:
+    """ The endpoints over a dataset, with the response cache; independent of the HTTP server. """
+
+    def __init__(self, path=DATA_PATH, cache_size=API_CACHE_SIZE):
+        self.path = path
+        self.cache = LRUCache(cache_size)
+
+    def get(self, endpoint, query_string=''):
+        """ (status, ETag, JSON body bytes) of a GET request; the body is cached and shared. """
+        if endpoint == '/health':
+            return 200, None, b'{"status": "ok"}'
+
+        if endpoint not in ENDPOINTS:
+            return 404, None, self.error('unknown endpoint {!r}, expected one of {}'.format(endpoint, ', '.join(ENDPOINTS)))
+
+        try:
+            params = normalize_params(endpoint, query_string)
+        except BadRequest as error:
+            return 400, None, self.error(str(error))
+
+        # the dataset version is part of the key: a changed dataset never serves older responses
+        version = dataset_digest(self.path)
+        key = (version, endpoint) + tuple(sorted(params.items()))
+
+        etag, body = self.cache.get_or_compute(key, lambda: self.render(endpoint, params, version))
+
+        return 200, etag, body
+
+    def render(self, endpoint, params, version):
+        """ (ETag, body) of a response, the ETag a hash of the body. """
+        filters = {'date': params['date'].strftime('%Y-%m-%d'), 'traffic': list(params['traffic'])}
+        response = {'endpoint': endpoint, 'filters': filters, 'dataset': version[:16], 'metrics': ENDPOINTS[endpoint](self.path, params)}
+
+        body = json.dumps(response, default=json_default, allow_nan=False).encode()
+
+        return '"{}"'.format(hashlib.sha1(body).hexdigest()), body
+
+    @staticmethod
+    def error(message):
+        return json.dumps({'error': message}).encode()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """ GET handler of the API (see MetricsApi.get). """
+
+    server_version = 'DelishMetrics/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+
+        try:
+            status, etag, body = self.server.api.get(url.path.rstrip('/') or '/', url.query)
+        except Exception as error:
+            self.log_error('%s failed: %r', self.path, error)
+            status, etag, body = 500, None, MetricsApi.error('internal error')
+
+        if etag is not None and etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+class MetricsServer(HTTPServer):
+    """ HTTP server handing every connection to a pool of worker threads. """
+
+    def __init__(self, address, api, workers=API_WORKERS):
+        super().__init__(address, MetricsHandler)
+        self.api = api
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='delish-api')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+# ======================================================================================================
+# COMMAND LINE
+# ======================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the dashboard metrics as JSON over HTTP.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='dataset csv or store')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=API_WORKERS, help='request worker threads')
+    parser.add_argument('--cache-size', type=int, default=API_CACHE_SIZE, help='responses kept in the LRU cache')
+    args = parser.parse_args()
+
+    server = MetricsServer((args.host, args.port), MetricsApi(args.path, args.cache_size), args.workers)
+    print('Serving the metrics API of {} on http://{}:{}'.format(args.path, args.host, args.port), file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
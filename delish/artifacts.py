@@ -0,0 +1,116 @@
+""" On-disk store of per filter state artifacts (KPIs, rankings, maps, ...) written ahead of time
+    by delish.precompute and read by the pages before computing anything live.
+
+    Layout: <directory>/<dataset version>/<artifact name>/<state id>.pkl.gz, one pickled value
+    per file. The dataset version combines the content hash of the source file with the cleaning
+    version, so a changed dataset or cleaning step never serves stale results: its states just
+    miss and are computed live.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import gzip
+import pickle
+import tempfile
+
+import pandas as pd
+
+from delish.cache    import LRUCache
+from delish.cleaning import CLEANING_VERSION
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+PRECOMPUTE_DIR = os.environ.get('DELISH_PRECOMPUTE_DIR', 'data/precomputed')
+
+# order of the traffic conditions in state ids (the sidebar order)
+TRAFFIC_ORDER = ['Low', 'Medium', 'High', 'Jam']
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def dataset_version(digest):
+    """ Folder name of a dataset version: content hash prefix and cleaning version. """
+    return '{}-v{}'.format(digest[:16], CLEANING_VERSION)
+
+def state_id(key):
+    """ File name stem of a state cache key (see delish.filters.filter_key), e.g.
+        (Timestamp('2022-04-06'), frozenset({'Low', 'Jam'})) -> '2022-04-06_Low+Jam'. Keys
+        extended with more values, such as (filter_state, map mode), append them.
+    """
+    if isinstance(key, tuple):
+        return '_'.join(state_id(part) for part in key)
+
+    if isinstance(key, pd.Timestamp):
+        return key.strftime('%Y-%m-%d')
+
+    if isinstance(key, frozenset):
+        ordered = sorted(key, key=lambda value: (TRAFFIC_ORDER.index(value) if value in TRAFFIC_ORDER else len(TRAFFIC_ORDER), value))
+        return '+'.join(ordered) or 'none'
+
+    return str(key).replace(' ', '-').replace('/', '-')
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class ArtifactStore:
+    """ Reads and writes the precomputed artifacts of one dataset version. """
+
+    def __init__(self, digest, directory=PRECOMPUTE_DIR):
+        self.root = os.path.join(directory, dataset_version(digest))
+
+    def path(self, name, key):
+        return os.path.join(self.root, name, state_id(key) + '.pkl.gz')
+
+    def read(self, name, key, default=None):
+        """ The stored value of artifact `name` for a state key, `default` when there is none. """
+        try:
+            with gzip.open(self.path(name, key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return default
+
+    def write(self, name, key, value):
+        """ Stores a value atomically (written to a temporary file, then renamed), so readers
+            never see a partial file. Returns the file path.
+        """
+        path = self.path(name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=3) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return path
+
+class StateCache(LRUCache):
+    """ LRU cache of per filter state results backed by an ArtifactStore: a miss in memory is
+        looked up on disk, and only states that were not precomputed are computed live.
+    """
+
+    def __init__(self, name, store, maxsize=32):
+        super().__init__(maxsize)
+        self.name = name
+        self.store = store
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.store.read(self.name, key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+            self.put(key, value)
+
+        return value
+
+_MISSING = object()
@@ -0,0 +1,108 @@
+""" Small in-process caching helpers shared by the loaders and the page computations. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import threading
+
+from collections import OrderedDict
+
+import numpy  as np
+import pandas as pd
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def read_only_series(series):
+    """ The series around a read-only view of its data, when the data is a numpy array or a
+        categorical (whose codes are then flagged); other columns (strings) are returned as is.
+    """
+    values = series.array
+
+    if isinstance(values, pd.Categorical):
+        codes = values.codes.view()
+        codes.flags.writeable = False
+        values = pd.Categorical.from_codes(codes, dtype=series.dtype)
+
+    else:
+        values = series.to_numpy()
+        if not isinstance(values, np.ndarray) or values.dtype == object or series.dtype != values.dtype:
+            return series
+
+        values = values.view()
+        values.flags.writeable = False
+
+    return pd.Series(values, index=series.index, name=series.name, copy=False)
+
+def read_only_view(df1):
+    """ Returns a read-only view of a cached dataframe, without copying it.
+
+        The view shares the column data with the cache, so handing it out is cheap. The numeric
+        arrays and categorical codes behind it are flagged read-only, so an in-place write
+        (e.g. `.loc[...] = `) raises instead of changing the cached frame for every session;
+        adding or replacing columns on the view (as the pages do) never leaks back either.
+        String columns are shared as they are: callers must not modify them in place.
+    """
+    return column_view(df1, df1.columns)
+
+def column_view(df1, columns):
+    """ Frame with only the given columns of a cached dataframe, without copying them.
+
+        df1.loc[:, columns] copies the selected columns; here every column is wrapped as its
+        own block around the cached data, flagged read-only as in read_only_view, so an
+        in-place write raises instead of corrupting the cache (copy-on-write: assign a new
+        column, or .copy() first).
+    """
+    return pd.DataFrame({column: read_only_series(df1[column]) for column in columns}, copy=False)
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class LRUCache:
+    """ Thread-safe mapping that keeps at most `maxsize` entries, evicting the least recently used. """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """ Returns the cached value for `key`, calling compute() and storing its result on a miss.
+
+            compute runs outside the lock, so two threads missing the same key at once may both
+            compute it; the last one wins, which is harmless for pure computations.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+_MISSING = object()
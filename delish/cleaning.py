@@ -0,0 +1,135 @@
+""" Cleaning pipeline that turns the raw orders csv into the typed dataframe used by the pages. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+from delish.geo    import delivery_distance_km
+from delish.schema import apply_schema
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# bump whenever the output of clean_dataframe (or of the cube and states derived from it) changes,
+# so stale on-disk snapshots and precomputed artifacts get rebuilt
+CLEANING_VERSION = 8
+
+# how the raw export marks a missing value
+NA_SENTINEL = 'NaN '
+
+# rows with the sentinel in any of these columns are dropped
+NA_COLUMNS = ['Delivery_person_Age', 'City', 'Road_traffic_density', 'Festival', 'multiple_deliveries', 'Time_Orderd']
+
+# text columns with trailing blanks; they are low-cardinality and come out as categoricals
+STRIP_COLUMNS = ['Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'City', 'Festival']
+
+# weather values come as 'conditions Fog', and 'conditions NaN' when missing
+WEATHER_PREFIX = 'conditions '
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def parse_unique(column, parse):
+    """ Applies `parse` (pd.Index -> pd.Index) to the distinct values of a column only and
+        broadcasts the result back to every row. Cheap for the low-cardinality raw columns,
+        where each distinct string would otherwise be parsed thousands of times.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+
+    return pd.Series(parse(pd.Index(uniques)).take(codes), index=column.index)
+
+def strip_to_category(column, normalize=lambda values: values.str.strip()):
+    """ Strips the blanks of a text column as a categorical: the distinct values are stripped
+        once and the row codes remapped, with sorted categories (the order astype('category')
+        and a plain groupby would give). `normalize` (pd.Index -> pd.Index) replaces the
+        stripping, values it turns into NaN become missing.
+    """
+    codes, uniques = pd.factorize(column)
+    new_codes, categories = pd.factorize(normalize(pd.Index(uniques)), sort=True)
+    codes = np.where(codes >= 0, new_codes.take(codes), -1)
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=column.index)
+
+def normalize_weather(values):
+    """ 'conditions Fog' -> 'Fog' and 'conditions NaN' -> NaN, on a pd.Index of raw values. """
+    values = values.str.strip().str.replace('^' + WEATHER_PREFIX.strip() + r'\s*', '', regex=True)
+
+    return values.where(values != 'NaN')
+
+def clean_dataframe(df1):
+    """ This function is responsible for cleaning the dataframe
+
+        Actions executed:
+        1. NaN data removed
+        2. Data types conversion
+        3. Blank spaces removed
+        4. Creates a day and week of year columns, and the order timestamp (Order_Date +
+           Time_Orderd)
+        5. Cleans text on the Time_taken(min) column
+        6. Computes the restaurant to delivery location distance (km)
+        7. Normalizes the weather: 'conditions Fog' -> 'Fog', 'conditions NaN' -> missing
+        8. Casts the columns to the compact dtypes of delish.schema
+
+        Every step is row-local, so it can be run on chunks of a larger file and the results
+        combined with concat_cleaned.
+
+        Input: Dataframe
+        Output: Dataframe
+
+    """
+    # removing NA: one combined mask, one filtered copy
+    rows_selected = (df1[NA_COLUMNS] == NA_SENTINEL).to_numpy().any(axis=1)
+    df1 = df1.take(np.flatnonzero(~rows_selected))
+
+    # data types conversion (parsed once per distinct value)
+    df1['Delivery_person_Ratings'] = parse_unique(df1['Delivery_person_Ratings'], lambda values: values.astype(float))
+    df1['Delivery_person_Age'] = parse_unique(df1['Delivery_person_Age'], lambda values: values.astype(int))
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y', cache=True)
+    df1['multiple_deliveries'] = parse_unique(df1['multiple_deliveries'], lambda values: values.astype(int))
+
+    # removing blank spaces
+    df1['ID'] = df1['ID'].str.strip()
+    for column in STRIP_COLUMNS:
+        df1[column] = strip_to_category(df1[column])
+
+    # time taken column: '(min) 24' -> 24
+    df1['Time_taken(min)'] = parse_unique(df1['Time_taken(min)'], lambda values: values.str.extract(r'(\d+)', expand=False).astype(int))
+
+    # creating the day and week of year columns
+    df1['Order_Date_Day'] = df1.Order_Date.dt.day.astype(int)
+    df1['Week_Of_Year'] = df1.Order_Date.dt.isocalendar().week.astype(int)
+
+    # order timestamp: '13:48:00' parsed once per distinct time, NaT when unreadable
+    df1['Order_Timestamp'] = df1['Order_Date'] + parse_unique(df1['Time_Orderd'], lambda values: pd.to_timedelta(values, errors='coerce'))
+
+    # restaurant to delivery location distance, computed once for every row
+    df1['Distance_delivery'] = delivery_distance_km(df1)
+
+    # weather names without the prefix, the 'NaN' weather as a missing value
+    df1['Weatherconditions'] = strip_to_category(df1['Weatherconditions'], normalize_weather)
+
+    # compact dtypes
+    df1 = apply_schema(df1)
+
+    return df1
+
+def concat_cleaned(frames):
+    """ Concatenates dataframes returned by clean_dataframe (e.g. one per chunk).
+
+        Categorical columns are unioned with sorted categories, where a plain pd.concat would
+        fall back to object dtype as soon as two chunks have different categories.
+    """
+    frames = list(frames)
+    df1 = pd.concat(frames)
+
+    for column, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(df1[column].dtype, pd.CategoricalDtype):
+            df1[column] = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+
+    return df1
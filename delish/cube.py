@@ -0,0 +1,136 @@
+""" Pre-aggregated orders cube at day grain, so the page charts scan cells instead of rows. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+from delish.schema import apply_schema
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# low-cardinality dimensions shared by most charts
+DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Festival', 'Type_of_order', 'Weatherconditions']
+
+# calendar attributes that depend only on Order_Date, so carrying them adds no cells
+CALENDAR = ['Order_Date_Day', 'Week_Of_Year']
+
+# measures stored as count / sum / sum of squares, enough to roll up mean and std exactly
+MEASURES = ['Time_taken(min)', 'Delivery_person_Ratings']
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def group_sum(df_values, keys):
+    """ Sums df_values per combination of the key series, sorted by key (missing last), with
+        the keys as the first columns.
+
+        Missing categorical keys stay a group of their own: pandas 1.5 drops them from
+        categorical group-bys even with dropna=False, so those keys are grouped on their codes
+        (missing as the code after the last category) and turned back into categories.
+    """
+    groupers = []
+    for key in keys:
+        if isinstance(key.dtype, pd.CategoricalDtype):
+            codes = key.cat.codes.to_numpy()
+            key = pd.Series(np.where(codes < 0, len(key.cat.categories), codes), index=key.index, name=key.name)
+        groupers.append(key)
+
+    df_sum = df_values.groupby(groupers, dropna=False).sum().sort_index().reset_index()
+
+    for key in keys:
+        if isinstance(key.dtype, pd.CategoricalDtype):
+            codes = df_sum[key.name].to_numpy()
+            df_sum[key.name] = pd.Categorical.from_codes(np.where(codes == len(key.cat.categories), -1, codes), dtype=key.dtype)
+
+    return df_sum
+
+def build_cube(df1):
+    """ Aggregates the cleaned orders into one row per combination of DIMENSIONS.
+
+        Columns of the cube: DIMENSIONS + CALENDAR, 'orders' (number of rows in the cell) and,
+        for every measure m in MEASURES, 'm_count' (non-null values), 'm_sum' and 'm_sumsq'.
+
+        Input: cleaned dataframe
+        Output: cube dataframe
+
+    """
+    keys = DIMENSIONS + CALENDAR
+
+    values = {'orders': np.ones(len(df1), dtype=np.int64)}
+    for measure in MEASURES:
+        column = df1[measure].astype(float)
+        values[measure + '_count'] = column.notna().astype(np.int64)
+        values[measure + '_sum'] = column
+        values[measure + '_sumsq'] = column * column
+
+    df_values = pd.DataFrame(values, index=df1.index)
+    df_cube = group_sum(df_values, [df1[key] for key in keys])
+
+    return df_cube
+
+def merge_cubes(cubes):
+    """ Adds up cubes built from disjoint sets of rows (e.g. chunks of a larger file) into one.
+
+        Every stored column is additive, so the cells with the same keys are simply summed.
+    """
+    keys = DIMENSIONS + CALENDAR
+    df_cube = pd.concat(cubes, ignore_index=True)
+
+    df_cube = group_sum(df_cube.drop(columns=keys), [df_cube[key] for key in keys])
+
+    return apply_schema(df_cube)
+
+def filter_cube(df_cube, date_limit, traffic_options):
+    """ Applies the pages' sidebar filters (date cutoff and traffic conditions) to the cube cells. """
+    rows_selected = (df_cube['Order_Date'] < date_limit) & df_cube['Road_traffic_density'].isin(traffic_options)
+
+    return df_cube.loc[rows_selected, :]
+
+def moments(df_rollup, measure):
+    """ Replaces the count / sum / sum of squares columns of a measure with its 'mean' and
+        sample 'std' (ddof=1, as pandas' std; NaN for a single value).
+    """
+    n = df_rollup[measure + '_count']
+    total = df_rollup[measure + '_sum']
+    variance = (df_rollup[measure + '_sumsq'] - total * total / n) / (n - 1)
+
+    df_rollup['mean'] = total / n
+    df_rollup['std'] = np.sqrt(variance.clip(lower=0)).where(n > 1)
+
+    return df_rollup.drop(columns=[measure + '_count', measure + '_sum', measure + '_sumsq'])
+
+def rollup(df_cube, by, measure=None):
+    """
+        Rolls the cube up to the given dimensions.
+
+        Parameters
+        ----------
+            Input:
+                df_cube: cube (or filtered cube) built by build_cube, or a filtered query of
+                    another engine (see delish.engines), which runs the roll-up itself
+
+                by: list of cube dimensions to keep
+
+                measure: str, optional
+                    One of MEASURES. When given, its mean and sample standard deviation
+                    (ddof=1, as pandas' std) are added as the 'mean' and 'std' columns.
+
+            Output:
+                Dataframe with the `by` columns, 'orders' and optionally 'mean' and 'std'
+
+    """
+    if not isinstance(df_cube, pd.DataFrame):
+        return df_cube.rollup(by, measure)
+
+    columns = ['orders']
+    if measure is not None:
+        columns += [measure + '_count', measure + '_sum', measure + '_sumsq']
+
+    df_rollup = group_sum(df_cube[columns], [df_cube[key] for key in by])
+
+    return df_rollup if measure is None else moments(df_rollup, measure)
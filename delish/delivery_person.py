@@ -0,0 +1,149 @@
+""" Tables of the Delivery Person page. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy as np
+
+from delish.cube     import rollup
+from delish.cache    import column_view
+from delish.rankings import top_bottom_n
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# columns of the filtered orders read by the page (its tables and the headline KPIs)
+PAGE_COLUMNS = ['Delivery_person_ID', 'Delivery_person_Ratings', 'Delivery_person_Age', 'Vehicle_condition',
+                'Distance_delivery', 'City', 'Time_taken(min)']
+
+# rows per page of the driver ratings table
+PAGE_SIZE = 50
+
+# sort options of the driver ratings table -> DriverTable sort key
+DRIVER_SORTS = {'Driver ID': 'id', 'Rating (high to low)': 'rating_desc', 'Rating (low to high)': 'rating_asc'}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def delivery_person_ratings(df1):
+    """ Average rating of every delivery person. """
+    df_delivery_ratings_mean = (column_view(df1, ['Delivery_person_ID', 'Delivery_person_Ratings']).groupby('Delivery_person_ID', observed=True).mean().sort_index().reset_index())
+
+    return df_delivery_ratings_mean
+
+def ratings_by_traffic(df_cube):
+    """ Rating mean and standard deviation by traffic density. """
+    df_ratings_traffic = rollup(df_cube, ['Road_traffic_density'], 'Delivery_person_Ratings')
+    df_ratings_traffic = df_ratings_traffic.set_index('Road_traffic_density').loc[:, ['mean', 'std']]
+
+    df_ratings_traffic.columns = ['Delivery_rating_mean', 'Delivery_rating_std']
+    df_ratings_traffic.reset_index()
+
+    return df_ratings_traffic
+
+def ratings_by_weather(df_cube):
+    """ Rating mean and standard deviation by weather, without the missing weather group (the
+        weather names are normalized during cleaning, see delish.cleaning).
+    """
+    df_ratings_weather = rollup(df_cube, ['Weatherconditions'], 'Delivery_person_Ratings')
+    df_ratings_weather = df_ratings_weather.loc[df_ratings_weather['Weatherconditions'].notna(), :]
+
+    df_ratings_weather = df_ratings_weather.set_index('Weatherconditions').loc[:, ['mean', 'std']]
+    df_ratings_weather.columns = ['Delivery_rating_mean', 'Delivery_rating_std']
+    df_ratings_weather.reset_index()
+
+    return df_ratings_weather
+
+def top_deliveries(df1, n=10):
+    """ This function will organize the top fastest and slowest delivery people of every city.
+
+        Returns (fastest, slowest): the n delivery people with the lowest mean delivery time of
+        each city, ascending, and the n with the highest, descending. Both come from a single
+        ranking pass (see delish.rankings).
+
+    """
+    return top_bottom_n(df1, n=n, group='City', key='Delivery_person_ID', value='Time_taken(min)')
+
+def build_driver_table(df1):
+    """ Ratings table of the delivery people of a filter state, indexed for paging (see DriverTable). """
+    return DriverTable(delivery_person_ratings(df1))
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class DriverTable:
+    """ Per delivery person ratings kept server-side, served one page at a time.
+
+        Built once per filter state: the rows are sorted by driver ID (case-insensitive) and
+        the rating orders are precomputed as permutations. A prefix search is then a binary
+        search for the range of matching IDs, and a page sorted by rating reads the precomputed
+        permutation (restricted to that range) instead of sorting again.
+
+    """
+
+    def __init__(self, df_ratings, key='Delivery_person_ID', value='Delivery_person_Ratings'):
+        keys = df_ratings[key].astype(str).str.strip().str.upper().to_numpy(dtype=str)
+        order = np.argsort(keys, kind='stable')
+
+        self.df = df_ratings.iloc[order].reset_index(drop=True)
+        self.keys = keys[order]
+
+        # NaN ratings last in both directions
+        ratings = self.df[value].to_numpy(dtype=np.float64)
+        self.orders = {'rating_asc': np.argsort(ratings, kind='stable'),
+                       'rating_desc': np.argsort(-ratings, kind='stable')}
+
+    def __len__(self):
+        return len(self.df)
+
+    def search(self, prefix=''):
+        """ [start, stop) range of the sorted rows whose ID starts with prefix. """
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return 0, len(self.keys)
+
+        start = int(np.searchsorted(self.keys, prefix, side='left'))
+        stop = int(np.searchsorted(self.keys, prefix + chr(0x10FFFF), side='left'))
+
+        return start, stop
+
+    def count(self, prefix=''):
+        """ Number of drivers whose ID starts with prefix. """
+        start, stop = self.search(prefix)
+
+        return stop - start
+
+    def page(self, prefix='', sort='id', page=1, page_size=PAGE_SIZE):
+        """
+            One page of the table.
+
+            Parameters
+            ----------
+                Input:
+                    prefix: driver ID prefix to search for ('' for every driver)
+                    sort: 'id', 'rating_desc' or 'rating_asc' (see DRIVER_SORTS)
+                    page: page number, from 1 (clamped to the pages there are)
+                    page_size: rows per page
+
+                Output:
+                    (Dataframe with the rows of the page, number of matching drivers)
+
+        """
+        start, stop = self.search(prefix)
+        total = stop - start
+
+        page = min(max(int(page), 1), max(-(-total // page_size), 1))
+        first = (page - 1) * page_size
+
+        if sort == 'id':
+            positions = np.arange(start + first, min(start + first + page_size, stop))
+        else:
+            order = self.orders[sort]
+            if total < len(order):
+                order = order[(order >= start) & (order < stop)]
+            positions = order[first:first + page_size]
+
+        return self.df.iloc[positions].reset_index(drop=True), total
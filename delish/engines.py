@@ -0,0 +1,261 @@
+""" Query engines behind the page metrics: pandas (the default) or an embedded DuckDB database.
+
+    The page functions take a filtered query instead of materialized frames for the metrics that
+    aggregate: delish.cube.rollup and delish.rankings.top_bottom_n hand a query its own roll-up
+    or ranking, and the order charts ask it for the orders per time bucket and week.
+
+    - PandasQuery runs them on the cached frame, cube and running aggregates, as before.
+    - DuckDBQuery pushes them down as SQL over an `orders` table, with the date and traffic
+      filters in the WHERE clause. The table lives in a database file next to the dataset,
+      (re)built from the cleaned frame when the dataset version changes.
+
+    Both return the same frames, with the same columns, dtypes and order; the means and standard
+    deviations of fractional measures (the ratings) may differ in the last bits, as the sums are
+    added in a different order. Pick the engine with DELISH_ENGINE=pandas|duckdb; duckdb is an
+    optional dependency (pip install duckdb), only imported when selected.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import threading
+
+import numpy  as np
+import pandas as pd
+
+from delish.cube      import filter_cube, moments, rollup
+from delish.lazy      import lazy_import
+from delish.cleaning  import CLEANING_VERSION
+from delish.rankings  import top_bottom_n
+
+duckdb = lazy_import('duckdb')
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+ENGINE = os.environ.get('DELISH_ENGINE', 'pandas')
+ENGINES = ['pandas', 'duckdb']
+
+# columns of the cleaned frame loaded into the database
+TABLE_COLUMNS = ['Order_Date', 'Order_Timestamp', 'Week_Of_Year', 'Order_Date_Day', 'City', 'Road_traffic_density', 'Festival',
+                 'Type_of_order', 'Weatherconditions', 'Delivery_person_ID', 'Delivery_person_Ratings', 'Time_taken(min)']
+
+# time grains (see delish.timegrain.GRAINS) -> DuckDB date_trunc part (weeks start on Monday)
+TRUNC_PARTS = {'Hour': 'hour', 'Day': 'day', 'Week': 'week', 'Month': 'month'}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def quoted(column):
+    return '"{}"'.format(column.replace('"', '""'))
+
+def database_path(path):
+    """ Database file of a dataset: data/train.csv -> data/train.duckdb, inside a store folder. """
+    return os.path.join(path, 'orders.duckdb') if os.path.isdir(path) else os.path.splitext(path)[0] + '.duckdb'
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class PandasQuery:
+    """ The metrics of a filter state from already filtered pandas inputs. """
+
+    def __init__(self, date_limit, traffic_options, df1, df_cube, aggregates):
+        self.date_limit = date_limit
+        self.traffic_options = traffic_options
+        self.df1 = df1
+        self.df_cube = df_cube
+        self.aggregates = aggregates
+
+    def rollup(self, by, measure=None):
+        return rollup(self.df_cube, by, measure)
+
+    def top_bottom_n(self, n, group, key, value):
+        return top_bottom_n(self.df1, n, group, key, value)
+
+    def orders_by_grain(self, grain):
+        return self.aggregates.orders_by_grain(self.date_limit, self.traffic_options, grain)
+
+    def weekly_drivers(self):
+        return self.aggregates.weekly_drivers(self.date_limit, self.traffic_options)
+
+class PandasEngine:
+    """ Queries over the cached frame (through the filter engine), cube and running aggregates. """
+
+    name = 'pandas'
+
+    def __init__(self, order_filter, df_cube, aggregates):
+        self.order_filter = order_filter
+        self.df_cube = df_cube
+        self.aggregates = aggregates
+
+    def query(self, date_limit, traffic_options, df1=None):
+        """ Query of a sidebar filter state; df1 are its already selected rows, if any. """
+        if df1 is None:
+            df1 = self.order_filter.select(date_limit, traffic_options)
+
+        return PandasQuery(date_limit, traffic_options, df1, filter_cube(self.df_cube, date_limit, traffic_options), self.aggregates)
+
+class DuckDBQuery:
+    """ The metrics of a filter state as SQL over the DuckDB `orders` table. df1 are the
+        already selected rows, if any: the SQL does not read them, they only size the query
+        (see delish.sections).
+    """
+
+    def __init__(self, engine, date_limit, traffic_options, df1=None):
+        self.engine = engine
+        self.date_limit = pd.Timestamp(date_limit)
+        self.traffic_options = list(traffic_options)
+        self.df1 = df1
+
+    def where(self):
+        """ WHERE clause of the sidebar filters and its parameters. """
+        if not self.traffic_options:
+            return 'FALSE', []
+
+        placeholders = ', '.join('?' for _ in self.traffic_options)
+        clause = '"Order_Date" < ? AND CAST("Road_traffic_density" AS VARCHAR) IN ({})'.format(placeholders)
+
+        return clause, [self.date_limit.to_pydatetime()] + self.traffic_options
+
+    def rollup(self, by, measure=None):
+        """ delish.cube.rollup of the filtered orders. """
+        columns = ['COUNT(*) AS orders']
+        if measure is not None:
+            value = 'CAST({} AS DOUBLE)'.format(quoted(measure))
+            columns += ['COUNT({0}) AS {1}'.format(value, quoted(measure + '_count')),
+                        'SUM({0}) AS {1}'.format(value, quoted(measure + '_sum')),
+                        'SUM({0} * {0}) AS {1}'.format(value, quoted(measure + '_sumsq'))]
+
+        keys = ', '.join(quoted(column) for column in by)
+        clause, parameters = self.where()
+        sql = 'SELECT {0}, {1} FROM orders WHERE {2} GROUP BY {0}'.format(keys, ', '.join(columns), clause)
+
+        df_rollup = self.engine.sorted_by(self.engine.execute(sql, parameters), by)
+        if measure is not None:
+            df_rollup[measure + '_count'] = df_rollup[measure + '_count'].astype(np.int64)
+            df_rollup = moments(df_rollup, measure)
+
+        return df_rollup
+
+    def top_bottom_n(self, n, group, key, value):
+        """ delish.rankings.top_bottom_n of the filtered orders: means per (group, key) ranked with
+            window functions, ties broken by key.
+        """
+        clause, parameters = self.where()
+        group, key, mean = quoted(group), quoted(key), quoted(value)
+        sql = '''
+            WITH means AS (SELECT {group}, {key}, AVG(CAST({mean} AS DOUBLE)) AS {mean}
+                           FROM orders WHERE {clause} AND {key} IS NOT NULL AND {group} IS NOT NULL GROUP BY {group}, {key})
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY {mean}, {key}) AS smallest_rank,
+                      ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY {mean} DESC, {key} DESC) AS largest_rank
+            FROM means'''.format(group=group, key=key, mean=mean, clause=clause)
+
+        df_ranked = self.engine.execute(sql, parameters)
+        columns = list(df_ranked.columns[:3])
+
+        def ranked(rank):
+            df_rank = self.engine.typed(df_ranked.loc[df_ranked[rank] <= n], columns[:2])
+            return df_rank.sort_values([columns[0], rank], ignore_index=True)[columns]
+
+        return ranked('smallest_rank'), ranked('largest_rank')
+
+    def orders_by_grain(self, grain):
+        """ RunningAggregates.orders_by_grain of the filtered orders. """
+        clause, parameters = self.where()
+        sql = '''SELECT date_trunc('{}', "Order_Timestamp") AS "Order_Timestamp", COUNT(*) AS "ID" FROM orders
+                 WHERE {} AND "Order_Timestamp" IS NOT NULL GROUP BY 1 ORDER BY 1'''.format(TRUNC_PARTS[grain], clause)
+
+        df1 = self.engine.execute(sql, parameters)
+
+        return self.engine.typed(df1, ['Order_Timestamp']).astype({'ID': np.int64})
+
+    def weekly_drivers(self):
+        """ RunningAggregates.weekly_drivers of the filtered orders (exact distinct counts). """
+        clause, parameters = self.where()
+        sql = '''SELECT "Week_Of_Year", COUNT(*) AS "ID", COUNT(DISTINCT "Delivery_person_ID") AS "Delivery_person_ID"
+                 FROM orders WHERE {} GROUP BY 1 ORDER BY 1'''.format(clause)
+
+        df1 = self.engine.execute(sql, parameters)
+
+        return self.engine.typed(df1, ['Week_Of_Year']).astype({'ID': np.int64, 'Delivery_person_ID': np.int64})
+
+class DuckDBEngine:
+    """ Cleaned orders in a DuckDB database file, queried read-only (one cursor per query, so
+        sessions can query from several threads).
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, database, dtypes):
+        self.database = database
+        self.dtypes = dtypes
+        self.connection = duckdb.connect(database, read_only=True)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, database, df1, digest):
+        """ Opens the database of a dataset version, writing it from the cleaned frame first
+            when it is missing or holds another version.
+        """
+        columns = [column for column in TABLE_COLUMNS if column in df1.columns]
+
+        if cls.version(database) != [digest, CLEANING_VERSION]:
+            tmp_path = database + '.tmp'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+            connection = duckdb.connect(tmp_path)
+            try:
+                connection.register('cleaned', df1.loc[:, columns])
+                connection.execute('CREATE TABLE orders AS SELECT * FROM cleaned')
+                connection.execute('CREATE TABLE meta AS SELECT ? AS digest, ? AS cleaning_version', [digest, CLEANING_VERSION])
+            finally:
+                connection.close()
+            os.replace(tmp_path, database)
+
+        # integer group-by keys come back from the cube in the dtype of a pandas index (int64
+        # before pandas 2, the column's own dtype since)
+        dtypes = {column: pd.Index([], dtype=dtype).dtype if pd.api.types.is_integer_dtype(dtype) else dtype for column, dtype in df1.dtypes[columns].items()}
+
+        return cls(database, dtypes)
+
+    @staticmethod
+    def version(database):
+        """ [digest, cleaning version] stored in a database file, None when there is none. """
+        if not os.path.exists(database):
+            return None
+
+        try:
+            connection = duckdb.connect(database, read_only=True)
+            try:
+                return list(connection.execute('SELECT digest, cleaning_version FROM meta').fetchone())
+            finally:
+                connection.close()
+        except duckdb.Error:
+            return None
+
+    def query(self, date_limit, traffic_options, df1=None):
+        return DuckDBQuery(self, date_limit, traffic_options, df1)
+
+    def execute(self, sql, parameters):
+        with self._lock:
+            cursor = self.connection.cursor()
+
+        try:
+            return cursor.execute(sql, parameters).df()
+        finally:
+            cursor.close()
+
+    def typed(self, df1, columns):
+        """ A result with its dimension `columns` back in the dtypes of the cleaned frame. """
+        return df1.astype({column: self.dtypes[column] for column in columns})
+
+    def sorted_by(self, df1, columns):
+        """ A result grouped by dimension `columns`, typed and sorted as pandas' sorted
+            group-bys (categorical columns by category order, missing values last).
+        """
+        return self.typed(df1, columns).sort_values(columns, ignore_index=True)
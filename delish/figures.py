@@ -0,0 +1,174 @@
+""" Plotly figures with a point and byte budget.
+
+    The chart builders below reduce their data before plotting: line series are downsampled with
+    LTTB (largest triangle three buckets, which keeps the visual shape: peaks, dips and trend),
+    bars are summed into buckets of consecutive x values and scatters keep their largest
+    markers. If the figure JSON still exceeds the byte budget, the point budget is halved and the
+    figure rebuilt. What was reduced is recorded in the figure's layout.meta['reduction'] and in
+    the `reductions` log.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+from collections import deque
+
+import numpy  as np
+import pandas as pd
+
+from delish.lazy import lazy_import
+
+px = lazy_import('plotly.express')
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# per chart: points sent to the browser and size of the figure JSON
+MAX_POINTS = 2000
+MAX_FIGURE_BYTES = 512 * 1024
+
+# below this many points a chart is never reduced further to meet the byte budget
+MIN_POINTS = 50
+
+# reductions of the last figures built in this process, newest last
+reductions = deque(maxlen=200)
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def lttb_indices(x, y, n_out):
+    """
+        Largest triangle three buckets downsampling.
+
+        Parameters
+        ----------
+            Input:
+                x, y: numeric arrays of the series, sorted by x
+                n_out: number of points to keep (>= 3)
+
+            Output:
+                sorted positions of the kept points, the first and last always included
+
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n - 2 inner points split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+
+        # average point of the next bucket (the last point for the last bucket)
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+
+        # point of this bucket making the largest triangle with the previous kept point
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return kept
+
+def numeric_axis(values):
+    """ An x column as float64, datetimes as nanoseconds (LTTB needs distances along x). """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+def downsample_line(df1, x, y, max_points, color=None):
+    """ Keeps at most max_points points of every line (one per `color` value) with LTTB. """
+    if len(df1) <= max_points:
+        return df1
+
+    groups = [df1] if color is None else [group for _, group in df1.groupby(color, observed=True, sort=False)]
+    per_line = max(max_points // len(groups), 3)
+
+    parts = []
+    for group in groups:
+        group = group.sort_values(x)
+        parts.append(group.iloc[lttb_indices(numeric_axis(group[x]), group[y].to_numpy(), per_line)])
+
+    return pd.concat(parts)
+
+def bucket_bars(df1, x, y, max_points):
+    """ Sums consecutive bars (sorted by x) into at most max_points buckets, each labeled with
+        its first x value. Right for additive measures such as order counts.
+    """
+    if len(df1) <= max_points:
+        return df1
+
+    df1 = df1.sort_values(x)
+    bucket = np.arange(len(df1)) * max_points // len(df1)
+
+    return (df1.groupby(bucket, sort=True)
+               .agg({x: 'first', y: 'sum'})
+               .reset_index(drop=True))
+
+def largest_markers(df1, size, max_points):
+    """ Keeps the max_points markers with the largest `size`. """
+    if len(df1) <= max_points:
+        return df1
+
+    return df1.nlargest(max_points, size).sort_index()
+
+def budgeted(name, method, df1, reduce, plot, max_points=MAX_POINTS, max_bytes=MAX_FIGURE_BYTES):
+    """
+        Builds a figure within the point and byte budget.
+
+        Parameters
+        ----------
+            Input:
+                name: chart name, for the reduction record
+                method: reduction applied ('lttb', 'bucket' or 'largest')
+                df1: Dataframe with the chart data
+                reduce: function (df1, max_points) -> reduced df1
+                plot: function (reduced df1) -> plotly figure
+                max_points, max_bytes: the budget
+
+            Output:
+                plotly figure, with layout.meta['reduction'] = {'chart', 'method', 'points_in',
+                'points_out', 'bytes'}
+
+    """
+    points = max_points
+    while True:
+        df_plot = reduce(df1, points)
+        fig = plot(df_plot)
+        size = len(fig.to_json())
+        if size <= max_bytes or points <= MIN_POINTS or len(df_plot) <= MIN_POINTS:
+            break
+        points = max(min(points, len(df_plot)) // 2, MIN_POINTS)
+
+    reduction = {'chart': name, 'method': method, 'points_in': len(df1), 'points_out': len(df_plot), 'bytes': size}
+    fig.update_layout(meta={'reduction': reduction})
+    reductions.append(reduction)
+
+    return fig
+
+def line_chart(df1, x, y, name='line', max_points=MAX_POINTS, max_bytes=MAX_FIGURE_BYTES, **kwargs):
+    """ px.line within the budget, LTTB-downsampled per line (kwargs go to px.line). """
+    return budgeted(name, 'lttb', df1, lambda df, points: downsample_line(df, x, y, points, kwargs.get('color')),
+                    lambda df: px.line(df, x=x, y=y, **kwargs), max_points, max_bytes)
+
+def bar_chart(df1, x, y, name='bar', max_points=MAX_POINTS, max_bytes=MAX_FIGURE_BYTES, **kwargs):
+    """ px.bar within the budget, consecutive bars summed into buckets (kwargs go to px.bar). """
+    return budgeted(name, 'bucket', df1, lambda df, points: bucket_bars(df, x, y, points),
+                    lambda df: px.bar(df, x=x, y=y, **kwargs), max_points, max_bytes)
+
+def scatter_chart(df1, x, y, size, name='scatter', max_points=MAX_POINTS, max_bytes=MAX_FIGURE_BYTES, **kwargs):
+    """ px.scatter within the budget, keeping the largest markers (kwargs go to px.scatter). """
+    return budgeted(name, 'largest', df1, lambda df, points: largest_markers(df, size, points),
+                    lambda df: px.scatter(df, x=x, y=y, size=size, **kwargs), max_points, max_bytes)
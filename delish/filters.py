@@ -0,0 +1,90 @@
+""" Indexed engine for the sidebar filters (date cutoff + traffic conditions). """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+from delish.cache import LRUCache, read_only_view, column_view
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def filter_key(date_limit, traffic_options):
+    """ Hashable, order-insensitive key of a sidebar filter state, for per-state caches. """
+    return (pd.Timestamp(date_limit), frozenset(traffic_options))
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class OrderFilter:
+    """ Answers `Order_Date < date_limit` and `Road_traffic_density in traffic_options` without
+        scanning the whole frame.
+
+        Built once per dataset:
+        1. The cleaned frame is sorted by Order_Date (stable), so a date cutoff is a prefix of
+           the rows, found with a binary search.
+        2. Road_traffic_density is encoded as categorical codes and, for each category, the
+           sorted row positions holding it are stored.
+
+        A selection with every traffic category is then a zero-copy positional slice; otherwise
+        the positions of the chosen categories are cut at the date prefix and merged. Only the
+        positions are memoized per (date_limit, traffic_options), with LRU eviction: at 4 bytes
+        per selected row they stay small next to the frame, which is sliced on every call
+        rather than kept once per filter state.
+
+    """
+
+    def __init__(self, df1, cache_size=16):
+        order = np.argsort(df1['Order_Date'].to_numpy(), kind='stable')
+
+        self.df1 = df1.take(order)
+        self.dates = self.df1['Order_Date'].to_numpy()
+
+        # int32 positions (half the memory of intp) whenever the frame is small enough
+        self.position_dtype = np.int32 if len(self.df1) < 2 ** 31 else np.intp
+
+        traffic = pd.Categorical(self.df1['Road_traffic_density'])
+        self.positions = {category: np.flatnonzero(traffic.codes == code).astype(self.position_dtype)
+                          for code, category in enumerate(traffic.categories)}
+
+        self._cache = LRUCache(cache_size)
+
+    def cutoff(self, date_limit):
+        """ Number of leading (date sorted) rows with Order_Date < date_limit. """
+        return int(np.searchsorted(self.dates, pd.Timestamp(date_limit).to_datetime64(), side='left'))
+
+    def select_positions(self, date_limit, traffic_options):
+        """ Row positions (into the date sorted frame) that pass both filters, as a slice when
+            every traffic category is selected or as a sorted array of positions otherwise.
+        """
+        return self._cache.get_or_compute(filter_key(date_limit, traffic_options),
+                                          lambda: self._select_positions(date_limit, traffic_options))
+
+    def _select_positions(self, date_limit, traffic_options):
+        stop = self.cutoff(date_limit)
+        categories = set(traffic_options) & set(self.positions)
+
+        if categories == set(self.positions):
+            return slice(0, stop)
+
+        parts = [self.positions[category] for category in categories]
+        parts = [positions[:np.searchsorted(positions, stop)] for positions in parts]
+
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=self.position_dtype)
+
+    def select(self, date_limit, traffic_options, columns=None):
+        """ Filtered rows for the given sidebar state, as a read-only view (see delish.cache).
+            The rows are sliced from the memoized positions on every call: a zero-copy view
+            when every traffic category is selected, a copy of the selected rows otherwise.
+
+            With `columns`, only those columns are selected (see delish.cache.column_view): a
+            page that reads a few columns then copies only those when the rows are not a
+            contiguous date prefix, and nothing at all when they are.
+        """
+        source = self.df1 if columns is None else column_view(self.df1, columns)
+
+        return read_only_view(source.iloc[self.select_positions(date_limit, traffic_options)])
@@ -0,0 +1,54 @@
+""" Vectorized great-circle distances for the restaurant -> delivery location pairs. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy as np
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# mean earth radius, the same value the haversine package uses for Unit.KILOMETERS
+EARTH_RADIUS_KM = 6371.0088
+
+# maximum absolute difference to haversine.haversine(..., unit='km'); both evaluate the same
+# formula in float64, so in practice the results agree to ~1e-9 km
+HAVERSINE_TOLERANCE_KM = 1e-6
+
+# restaurant to delivery distances at or above this come from bad coordinates
+MAX_DISTANCE_KM = 100
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+        Great-circle distance in km between two arrays of points, computed in one NumPy pass.
+
+        Parameters
+        ----------
+            Input:
+                lat1, lon1: array-like with the latitude and longitude of the origin points
+                lat2, lon2: array-like with the latitude and longitude of the destination points
+                            (all in decimal degrees, same length or broadcastable)
+
+            Output:
+                np.ndarray of float64 with the distances, within HAVERSINE_TOLERANCE_KM of the
+                haversine package. Unlike the package it does not validate coordinate ranges.
+
+    """
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))
+
+    d = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+def delivery_distance_km(df1):
+    """ Distance between the restaurant and the delivery location of every order. """
+    return haversine_km(df1['Restaurant_latitude'], df1['Restaurant_longitude'],
+                        df1['Delivery_location_latitude'], df1['Delivery_location_longitude'])
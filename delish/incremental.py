@@ -0,0 +1,223 @@
+""" Running aggregates behind the pages, updated in place batch by batch. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import threading
+
+from collections import defaultdict
+
+import numpy  as np
+import pandas as pd
+
+from delish.cube   import DIMENSIONS, CALENDAR, build_cube, filter_cube, rollup
+from delish.schema import apply_schema
+from delish.sketch import HyperLogLog, hash_values, grouped_registers
+from delish.timegrain import hourly_orders, rollup_grain
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+CUBE_KEYS = DIMENSIONS + CALENDAR
+
+# keys of the unique delivery people sets / sketches
+DRIVER_KEYS = ['Order_Date', 'Road_traffic_density']
+
+# 'exact': hash sets of driver ids, 'approx': HyperLogLog sketches (see delish.sketch)
+DISTINCT_MODES = ['exact', 'approx']
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def key_values(column):
+    """ Column values usable as dict keys: missing values become None (NaN never equals itself). """
+    return column.astype(object).where(column.notna(), None).tolist()
+
+def driver_sketches(df1):
+    """ {(Order_Date, Road_traffic_density): HyperLogLog of Delivery_person_ID} of a batch, all
+        sketches filled in one vectorized pass.
+    """
+    hashes, valid = hash_values(df1['Delivery_person_ID'])
+    for key in DRIVER_KEYS:
+        valid &= df1[key].notna().to_numpy()
+
+    keys = pd.MultiIndex.from_arrays([df1[key].to_numpy()[valid] for key in DRIVER_KEYS])
+    codes, uniques = keys.factorize()
+    registers = grouped_registers(codes, len(uniques), hashes[valid])
+
+    return {key: HyperLogLog(registers=row) for key, row in zip(uniques, registers)}
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class RunningAggregates:
+    """ Aggregates of the orders dataset that can absorb new batches without a full recomputation.
+
+        - cells: the orders cube (see delish.cube) as {cell key: array of additive values}. It
+          holds the orders per day and week and the count / sum / sum of squares accumulators of
+          Time_taken(min) and Delivery_person_Ratings for every combination of dimensions.
+        - drivers: {(Order_Date, Road_traffic_density): unique Delivery_person_ID}, behind the
+          unique deliverers metric and orders_driver_weekly, mergeable across any date range and
+          traffic set. With distinct='exact' (the default) each entry is the set of ids; with
+          distinct='approx' it is a fixed-size HyperLogLog sketch (see delish.sketch for the
+          error bound), which keeps the memory flat however many drivers there are.
+        - hours: {(Order_Hour, Road_traffic_density): orders}, the hourly rollup the hour, day,
+          week and month views of the orders are derived from (see delish.timegrain), in the
+          datetime resolution of the cleaned Order_Timestamp (hour_dtype).
+
+        update() touches only the cells and sets present in the batch, so its cost depends on
+        the batch size, not on the history. Updates and reads are serialized by a lock, so a
+        batch can be appended while sessions read.
+
+    """
+
+    def __init__(self, distinct='exact'):
+        if distinct not in DISTINCT_MODES:
+            raise ValueError('unknown distinct mode {!r}, expected one of {}'.format(distinct, DISTINCT_MODES))
+
+        self.distinct = distinct
+        self.cells = {}
+        self.drivers = defaultdict(set) if distinct == 'exact' else {}
+        self.columns = None
+        self.hours = {}
+        self.hour_dtype = np.dtype('datetime64[ns]')
+        self._cube = None
+        self._hourly = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_frame(cls, df1, df_cube=None, distinct='exact'):
+        """ Aggregates of a whole cleaned frame (reusing its cube when it is already built). """
+        aggregates = cls(distinct)
+        aggregates.update(df1, df_cube)
+
+        return aggregates
+
+    def update(self, df1, df_cube=None):
+        """ Folds a cleaned batch (and optionally its already built cube) into the aggregates. """
+        if df_cube is None:
+            df_cube = build_cube(df1)
+
+        columns = [column for column in df_cube.columns if column not in CUBE_KEYS]
+        keys = zip(*(key_values(df_cube[key]) for key in CUBE_KEYS))
+        values = df_cube[columns].to_numpy(dtype=np.float64)
+
+        if self.distinct == 'exact':
+            df_drivers = df1.groupby(DRIVER_KEYS, observed=True)['Delivery_person_ID'].unique()
+        else:
+            sketches = driver_sketches(df1)
+
+        hourly = hourly_orders(df1)
+
+        with self._lock:
+            self.columns = columns
+            self.hour_dtype = df1['Order_Timestamp'].dtype
+            for key, row in zip(keys, values):
+                current = self.cells.get(key)
+                self.cells[key] = row if current is None else current + row
+
+            if self.distinct == 'exact':
+                for key, drivers in df_drivers.items():
+                    self.drivers[key].update(drivers)
+            else:
+                for key, sketch in sketches.items():
+                    if key in self.drivers:
+                        self.drivers[key].merge(sketch)
+                    else:
+                        self.drivers[key] = sketch
+
+            for key, orders in hourly.items():
+                self.hours[key] = self.hours.get(key, 0) + int(orders)
+
+            self._cube = None
+            self._hourly = None
+
+    def cube(self):
+        """ The cells as a cube dataframe, the same shape build_cube returns. Cached until the
+            next update.
+        """
+        with self._lock:
+            if self._cube is None:
+                self._cube = self._build_cube()
+
+            return self._cube
+
+    def _build_cube(self):
+        df_keys = pd.DataFrame.from_records(list(self.cells), columns=CUBE_KEYS)
+        df_values = pd.DataFrame(np.vstack(list(self.cells.values())), columns=self.columns)
+
+        counts = [column for column in self.columns if column == 'orders' or column.endswith('_count')]
+        df_values = df_values.astype({column: np.int64 for column in counts})
+
+        df_cube = apply_schema(pd.concat([df_keys, df_values], axis=1))
+
+        return df_cube.sort_values(CUBE_KEYS, ignore_index=True)
+
+    def hourly(self):
+        """ The hourly rollup as a Dataframe with Order_Hour, Road_traffic_density and orders.
+            Cached until the next update.
+        """
+        with self._lock:
+            if self._hourly is None:
+                df_hourly = pd.DataFrame.from_records(list(self.hours), columns=['Order_Hour', 'Road_traffic_density'])
+                df_hourly['orders'] = np.fromiter(self.hours.values(), dtype=np.int64, count=len(self.hours))
+                self._hourly = df_hourly.astype({'Order_Hour': self.hour_dtype, 'Road_traffic_density': 'category'})
+
+            return self._hourly
+
+    def orders_by_grain(self, date_limit, traffic_options, grain):
+        """ Orders per hour, day, week or month (see delish.timegrain.GRAINS) for a sidebar
+            filter state, as a Dataframe with Order_Timestamp and ID.
+        """
+        return rollup_grain(self.hourly(), date_limit, traffic_options, grain)
+
+    def weekly_drivers(self, date_limit, traffic_options):
+        """
+            Orders and unique delivery people per week for a sidebar filter state.
+
+            Parameters
+            ----------
+                Input:
+                    date_limit: only days before it are counted
+                    traffic_options: list of Road_traffic_density values to keep
+
+                Output:
+                    Dataframe with Week_Of_Year, ID (orders) and Delivery_person_ID (unique
+                    delivery people), the table orders_driver_weekly plots
+
+        """
+        weeks = self._merged_drivers(date_limit, traffic_options, lambda order_date: order_date.isocalendar()[1])
+
+        df_aux1 = rollup(filter_cube(self.cube(), date_limit, traffic_options), ['Week_Of_Year'])
+        df_aux1 = df_aux1.rename(columns={'orders': 'ID'})
+        df_aux2 = pd.DataFrame({'Week_Of_Year': list(weeks), 'Delivery_person_ID': [self._count(drivers) for drivers in weeks.values()]})
+
+        return pd.merge(df_aux1, df_aux2.astype({'Week_Of_Year': df_aux1['Week_Of_Year'].dtype}), how='inner')
+
+    def unique_drivers(self, date_limit, traffic_options):
+        """ Unique delivery people of a sidebar filter state (estimated in 'approx' mode). """
+        merged = self._merged_drivers(date_limit, traffic_options, lambda order_date: None)
+
+        return self._count(merged[None]) if merged else 0
+
+    def _merged_drivers(self, date_limit, traffic_options, bucket):
+        """ {bucket(Order_Date): union of the driver sets / sketches} over the filter state. """
+        date_limit = pd.Timestamp(date_limit)
+        traffic_options = set(traffic_options)
+
+        merged = {}
+        with self._lock:
+            for (order_date, traffic), drivers in self.drivers.items():
+                if order_date < date_limit and traffic in traffic_options:
+                    key = bucket(order_date)
+                    if key not in merged:
+                        merged[key] = set() if self.distinct == 'exact' else HyperLogLog()
+                    merged[key] |= drivers
+
+        return merged
+
+    def _count(self, drivers):
+        return len(drivers) if self.distinct == 'exact' else drivers.count()
@@ -0,0 +1,207 @@
+""" Streaming ingestion of order exports that don't fit in memory.
+
+    Reads one csv, or a glob of daily files, in chunks. Every chunk is cleaned with
+    clean_dataframe, written to a columnar store as its own Feather part and folded into the
+    orders cube, so peak memory depends on the chunk size and the number of cube cells, not on
+    the size of the input.
+
+        python -m delish.ingest 'exports/*.csv' --out data/store --chunksize 100000
+
+    The store is a folder with part-*.feather files (cleaned rows), cube-*.feather files (orders
+    cube deltas, summed on read) and manifest.json. New batches are added with append_to_store,
+    without touching the existing parts. Point the dashboard at it with
+    DELISH_DATA_PATH=data/store; delish.loader reads stores and csv files alike, so the page
+    functions work unchanged.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import glob
+import json
+import argparse
+
+import pandas as pd
+
+from delish.cube     import build_cube, merge_cubes
+from delish.cleaning import CLEANING_VERSION, clean_dataframe, concat_cleaned
+from delish.snapshot import pa, read_snapshot, write_frame
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+MANIFEST_FILE = 'manifest.json'
+PART_PATTERN = 'part-{:05d}.feather'
+CUBE_PATTERN = 'cube-{:05d}.feather'
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def is_store(path):
+    """ True when the path is a folder written by ingest. """
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+def expand_sources(sources):
+    """ Expands file names and glob patterns into a sorted list of csv paths. """
+    paths = []
+    for source in sources:
+        matches = sorted(glob.glob(source))
+        if not matches:
+            raise FileNotFoundError('no file matches {!r}'.format(source))
+        paths.extend(matches)
+
+    return paths
+
+def iter_raw_chunks(paths, chunksize):
+    """ Yields raw dataframes of at most `chunksize` rows, file after file. """
+    for path in paths:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+def ingest(sources, store_dir, chunksize=100_000):
+    """
+        Cleans the sources chunk by chunk into a columnar store.
+
+        Parameters
+        ----------
+            Input:
+                sources: list of csv paths or glob patterns (e.g. 'exports/2022-*.csv')
+                store_dir: output folder, previous parts in it are replaced
+                chunksize: rows read from the csv at a time
+
+            Output:
+                manifest: dict with the sources, parts and row counts written to manifest.json
+
+    """
+    if pa is None:
+        raise ImportError('pyarrow is required to write the columnar store')
+
+    paths = expand_sources(sources)
+
+    os.makedirs(store_dir, exist_ok=True)
+    for pattern in (PART_PATTERN, CUBE_PATTERN):
+        for old_file in glob.glob(os.path.join(store_dir, pattern.replace('{:05d}', '*'))):
+            os.remove(old_file)
+
+    df_cube = None
+    parts = []
+    rows_in = rows_out = 0
+
+    for number, raw in enumerate(iter_raw_chunks(paths, chunksize)):
+        df1 = clean_dataframe(raw)
+
+        part = PART_PATTERN.format(number)
+        write_frame(df1, os.path.join(store_dir, part))
+        parts.append(part)
+
+        # fold the chunk into the running aggregates; the cleaned chunk is dropped afterwards
+        df_chunk_cube = build_cube(df1)
+        df_cube = df_chunk_cube if df_cube is None else merge_cubes([df_cube, df_chunk_cube])
+
+        rows_in += len(raw)
+        rows_out += len(df1)
+
+    if df_cube is None:
+        raise ValueError('the sources have no rows to ingest')
+
+    cube = CUBE_PATTERN.format(0)
+    write_frame(df_cube, os.path.join(store_dir, cube))
+
+    manifest = {'sources': paths, 'parts': parts, 'cubes': [cube], 'rows_in': rows_in, 'rows_out': rows_out,
+                'chunksize': chunksize, 'cleaning_version': CLEANING_VERSION}
+
+    # written last: a store without a manifest is never picked up by the loader
+    write_manifest(store_dir, manifest)
+
+    return manifest
+
+def append_to_store(store_dir, df1, rows_in=None):
+    """
+        Appends a batch of cleaned orders to an existing store.
+
+        The batch becomes a new part plus a cube delta; the existing files are not read or
+        rewritten, so the cost depends on the batch size only. Stores cleaned by another version
+        of the pipeline are refused, their parts would not concatenate with the batch.
+
+        Parameters
+        ----------
+            Input:
+                store_dir: folder written by ingest
+                df1: batch cleaned with clean_dataframe
+                rows_in: number of raw rows the batch came from (defaults to len(df1))
+
+            Output:
+                manifest: the updated manifest
+
+    """
+    manifest = read_manifest(store_dir)
+    check_cleaning_version(store_dir, manifest)
+
+    part = PART_PATTERN.format(len(manifest['parts']))
+    cube = CUBE_PATTERN.format(len(manifest['cubes']))
+    write_frame(df1, os.path.join(store_dir, part))
+    write_frame(build_cube(df1), os.path.join(store_dir, cube))
+
+    manifest['parts'].append(part)
+    manifest['cubes'].append(cube)
+    manifest['rows_in'] += len(df1) if rows_in is None else rows_in
+    manifest['rows_out'] += len(df1)
+    write_manifest(store_dir, manifest)
+
+    return manifest
+
+def write_manifest(store_dir, manifest):
+    """ Writes manifest.json atomically (temporary file + rename). """
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def read_manifest(store_dir):
+    with open(os.path.join(store_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+def check_cleaning_version(store_dir, manifest):
+    """ Raises ValueError when the store's parts were cleaned by another version of
+        clean_dataframe (their columns and values may differ from the current ones).
+    """
+    version = manifest.get('cleaning_version')
+    if version != CLEANING_VERSION:
+        raise ValueError('the store {!r} was cleaned with version {} of the pipeline, the current one is {}: '
+                         're-ingest its sources with python -m delish.ingest'.format(store_dir, version, CLEANING_VERSION))
+
+def read_store(store_dir):
+    """ Cleaned dataframe of a store: every part memory-mapped and concatenated. Stores cleaned
+        by another version of the pipeline raise ValueError (see check_cleaning_version).
+    """
+    manifest = read_manifest(store_dir)
+    check_cleaning_version(store_dir, manifest)
+    frames = [read_snapshot(os.path.join(store_dir, part)) for part in manifest['parts']]
+
+    return concat_cleaned(frames).reset_index(drop=True)
+
+def read_store_cube(store_dir):
+    """ Orders cube of a store (see delish.cube): the ingestion cube plus every appended delta. """
+    manifest = read_manifest(store_dir)
+    check_cleaning_version(store_dir, manifest)
+    cubes = [read_snapshot(os.path.join(store_dir, cube)) for cube in manifest['cubes']]
+
+    return cubes[0] if len(cubes) == 1 else merge_cubes(cubes)
+
+# ======================================================================================================
+# COMMAND LINE
+# ======================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest order csv exports into a columnar store.')
+    parser.add_argument('sources', nargs='+', help='csv files or glob patterns')
+    parser.add_argument('--out', default='data/store', help='store folder')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    manifest = ingest(args.sources, args.out, args.chunksize)
+    print('{} rows read, {} rows stored in {} parts at {}'.format(manifest['rows_in'], manifest['rows_out'], len(manifest['parts']), args.out))
@@ -0,0 +1,116 @@
+""" Headline metrics of the Restaurants and Delivery Person pages, computed together. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+from dataclasses import dataclass
+from typing      import Optional
+
+import numpy  as np
+import pandas as pd
+
+from delish.cube    import rollup
+from delish.spatial import coordinate_flags
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+@dataclass(frozen=True)
+class Kpis:
+    """ Metric values of one filter state, rounded as the pages display them. A metric is None
+        when the filtered data has nothing to compute it from.
+    """
+    unique_deliverers: int
+    avg_distance_km: Optional[float]
+    festival_avg_time: Optional[float]
+    festival_std_time: Optional[float]
+    avg_time: Optional[float]
+    std_time: Optional[float]
+    maximum_age: Optional[int]
+    minimum_age: Optional[int]
+    best_vehicle_condition: Optional[int]
+    worst_vehicle_condition: Optional[int]
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def count_distinct(column):
+    """ Number of distinct non-missing values, from the categorical codes when there are some. """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0], minlength=1)))
+
+    return int(column.nunique())
+
+def extremes(column):
+    """ (max, min) of an integer column as python ints, (None, None) when it is empty. """
+    values = column.to_numpy()
+    if len(values) == 0:
+        return None, None
+
+    return int(values.max()), int(values.min())
+
+def rounded(value, decimals=2):
+    """ value rounded as a python float, None when missing. """
+    return None if value is None or pd.isna(value) else round(float(value), decimals)
+
+def compute_kpis(df1, df_cube, unique_deliverers=None, valid=None):
+    """
+        Every headline metric of a filter state in one pass.
+
+        The row metrics (distinct delivery people, distance, age and vehicle condition
+        extremes) read each column of the filtered frame once, and the festival / non-festival
+        delivery time mean and std come from a single roll-up of the filtered cube, instead of
+        one group-by per metric.
+
+        Parameters
+        ----------
+            Input:
+                df1: Dataframe with the filtered orders
+                df_cube: orders cube (see delish.cube) with the same filters applied
+                unique_deliverers: int, optional. Already known count of delivery people
+                    (e.g. estimated from sketches), otherwise counted from df1
+                valid: bool array, optional. Rows of df1 with valid coordinates, from the
+                    spatial index (see delish.spatial.SpatialIndex.valid_rows), otherwise
+                    flagged from df1
+
+            Output:
+                Kpis
+
+    """
+    if valid is None:
+        valid = coordinate_flags(df1) == 0
+    distance = df1['Distance_delivery'].to_numpy()[valid]
+
+    maximum_age, minimum_age = extremes(df1['Delivery_person_Age'])
+    best_condition, worst_condition = extremes(df1['Vehicle_condition'])
+
+    df_festival = rollup(df_cube, ['Festival'], 'Time_taken(min)')
+    festival = dict(zip(df_festival['Festival'].astype(str), zip(df_festival['mean'], df_festival['std'])))
+    festival_mean, festival_std = festival.get('Yes', (None, None))
+    regular_mean, regular_std = festival.get('No', (None, None))
+
+    if unique_deliverers is None:
+        unique_deliverers = count_distinct(df1['Delivery_person_ID'])
+
+    return Kpis(unique_deliverers=unique_deliverers,
+                avg_distance_km=rounded(distance.mean() if len(distance) else None),
+                festival_avg_time=rounded(festival_mean),
+                festival_std_time=rounded(festival_std),
+                avg_time=rounded(regular_mean),
+                std_time=rounded(regular_std),
+                maximum_age=maximum_age,
+                minimum_age=minimum_age,
+                best_vehicle_condition=best_condition,
+                worst_vehicle_condition=worst_condition)
+
+def filter_state_kpis(df1, df_cube, aggregates, date_limit, traffic_options, valid=None):
+    """ compute_kpis for a sidebar filter state. When the running aggregates keep approximate
+        distinct counts (see delish.incremental), the unique deliverers are estimated from their
+        merged sketches instead of counted from the rows.
+    """
+    unique_deliverers = aggregates.unique_drivers(date_limit, traffic_options) if aggregates.distinct == 'approx' else None
+
+    return compute_kpis(df1, df_cube, unique_deliverers, valid)
@@ -0,0 +1,34 @@
+""" Lazy imports for the heavy plotting and mapping libraries.
+
+    `px = lazy_import('plotly.express')` binds a placeholder module; the real import runs the
+    first time an attribute is read (e.g. px.bar inside the function that draws the chart), so
+    a page only pays for the libraries of the sections it actually renders.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import sys
+import types
+import importlib
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class LazyModule(types.ModuleType):
+    """ Stand-in for a module that is imported on first attribute access. """
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def lazy_import(name):
+    """ The module `name` if it is already imported, else a LazyModule that imports it when used. """
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,248 @@
+""" Shared data-loading layer: every page and session reads the same cached, cleaned frame.
+
+    The dataset is the csv at DELISH_DATA_PATH (default data/train.csv) or a columnar store
+    folder written by delish.ingest.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import hashlib
+import threading
+
+import pandas as pd
+
+from delish.incremental import RunningAggregates
+from delish.artifacts   import ArtifactStore, StateCache
+from delish.cache    import read_only_view
+from delish.filters  import OrderFilter
+from delish.spatial  import SpatialIndex
+from delish.engines  import ENGINE, ENGINES, PandasEngine, DuckDBEngine, database_path
+from delish.ingest   import MANIFEST_FILE, is_store, read_store, read_store_cube, read_manifest, append_to_store, check_cleaning_version
+from delish.cleaning import clean_dataframe, concat_cleaned
+from delish.snapshot import snapshot_path, snapshot_metadata, is_fresh, read_snapshot, write_snapshot
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+DATA_PATH = os.environ.get('DELISH_DATA_PATH', 'data/train.csv')
+
+# unique delivery people counts: 'exact' or 'approx' (HyperLogLog, see delish.sketch)
+DISTINCT_MODE = os.environ.get('DELISH_DISTINCT', 'exact')
+
+# artifact name prefix of the per filter state caches (see load_state_cache)
+STATE_CACHE_PREFIX = 'state:'
+
+# one entry per source path: {'stat': ..., 'digest': ..., 'frame': ..., 'pending': [...], 'artifacts': {...}}
+_cache = {}
+_lock = threading.Lock()
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def file_stat(path):
+    """ Cheap fingerprint of a file: (size in bytes, modification time in ns). """
+    stat = os.stat(path)
+
+    return (stat.st_size, stat.st_mtime_ns)
+
+def file_digest(path, block_size=1 << 20):
+    """ SHA-1 of the file contents, read in blocks so large exports don't need to fit in memory. """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def source_file(path):
+    """ File whose fingerprint versions a dataset: the csv itself, or the manifest of a store. """
+    return os.path.join(path, MANIFEST_FILE) if is_store(path) else path
+
+def build_orders(path, stat, digest=None):
+    """ Builds the cleaned dataframe for a csv, going through its columnar snapshot.
+
+        A fresh snapshot is memory-mapped as is. Otherwise the csv is parsed and cleaned, and
+        the snapshot is (re)written for the next process.
+
+        Stores written by delish.ingest are already cleaned and columnar, they are read as is.
+
+        Input: csv path, its file_stat and, when already known, its content hash
+        Output: (csv content hash, cleaned dataframe)
+
+    """
+    if is_store(path):
+        return digest or file_digest(source_file(path)), read_store(path)
+
+    snapshot = snapshot_path(path)
+    metadata = snapshot_metadata(snapshot)
+
+    def digest_fn():
+        nonlocal digest
+        if digest is None:
+            digest = file_digest(path)
+        return digest
+
+    if is_fresh(metadata, stat, digest_fn):
+        return metadata['digest'], read_snapshot(snapshot)
+
+    df1 = clean_dataframe(pd.read_csv(path))
+    write_snapshot(df1, snapshot, stat, digest_fn())
+
+    return digest_fn(), df1
+
+def load_orders(path=DATA_PATH):
+    """ Loads and cleans the orders dataset once per process.
+
+        The cleaned dataframe is cached keyed on the file's size and modification time. When
+        those change the contents are hashed: a real change rebuilds the frame, a plain touch
+        just refreshes the stored fingerprint. Cold starts read the columnar snapshot when it is
+        up to date (see delish.snapshot). Thread safe, so concurrent sessions share one build.
+
+        Input: path of the raw orders csv (or of an ingested store)
+        Output: read-only view of the cleaned dataframe
+
+    """
+    stat = file_stat(source_file(path))
+
+    with _lock:
+        entry = _cache.get(path)
+
+        if entry is None:
+            digest, frame = build_orders(path, stat)
+            entry = _cache[path] = {'stat': stat, 'digest': digest, 'frame': frame, 'pending': [], 'artifacts': {}}
+
+        elif entry['stat'] != stat:
+            digest = file_digest(source_file(path))
+
+            if entry['digest'] != digest:
+                entry['digest'], entry['frame'] = build_orders(path, stat, digest)
+                entry['pending'] = []
+                entry['artifacts'] = {}
+
+            entry['stat'] = stat
+
+        # batches appended since the last read are concatenated once, on demand
+        if entry['pending']:
+            entry['frame'] = concat_cleaned([entry['frame']] + entry['pending'])
+            entry['pending'] = []
+
+    return read_only_view(entry['frame'])
+
+def dataset_digest(path=DATA_PATH):
+    """ Content hash of the cached dataset version (see load_orders). """
+    load_orders(path)
+
+    with _lock:
+        return _cache[path]['digest']
+
+def load_derived(name, builder, path=DATA_PATH):
+    """ Returns an artifact derived from the cleaned dataset, building it once per dataset version.
+
+        Artifacts live next to the cached frame and are dropped together with it when the source
+        file changes.
+
+        Input: artifact name, builder function (cleaned dataframe -> artifact), csv path
+        Output: the cached artifact (dataframes are returned as read-only views)
+
+    """
+    load_orders(path)
+
+    with _lock:
+        entry = _cache[path]
+        if name not in entry['artifacts']:
+            entry['artifacts'][name] = builder(entry['frame'])
+        artifact = entry['artifacts'][name]
+
+    return read_only_view(artifact) if isinstance(artifact, pd.DataFrame) else artifact
+
+def load_aggregates(path=DATA_PATH):
+    """ Running aggregates (see delish.incremental) of the cached dataset. Stores ship the cube
+        they accumulated during ingestion, csv files get it built from the cleaned frame.
+    """
+    def builder(df1):
+        return RunningAggregates.from_frame(df1, read_store_cube(path) if is_store(path) else None, DISTINCT_MODE)
+
+    return load_derived('aggregates', builder, path)
+
+def load_cube(path=DATA_PATH):
+    """ Day-grain orders cube (see delish.cube) of the cached dataset. """
+    return read_only_view(load_aggregates(path).cube())
+
+def load_filter(path=DATA_PATH):
+    """ Indexed date/traffic filter engine (see delish.filters) over the cached dataset. """
+    return load_derived('filter', OrderFilter, path)
+
+def load_spatial(path=DATA_PATH):
+    """ Grid index of the restaurant and delivery coordinates (see delish.spatial), built over
+        the date sorted frame of load_filter so its positions combine with a filter selection.
+    """
+    order_filter = load_filter(path)
+
+    return load_derived('spatial', lambda df1: SpatialIndex(order_filter.df1), path)
+
+def load_engine(path=DATA_PATH, engine=ENGINE):
+    """ Query engine of the page metrics (see delish.engines), 'pandas' or 'duckdb' as
+        configured by DELISH_ENGINE. The DuckDB database is opened once per dataset version.
+    """
+    if engine not in ENGINES:
+        raise ValueError('unknown engine {!r}, expected one of {}'.format(engine, ENGINES))
+
+    if engine == 'pandas':
+        return PandasEngine(load_filter(path), load_cube(path), load_aggregates(path))
+
+    digest = dataset_digest(path)
+
+    return load_derived('engine:duckdb', lambda df1: DuckDBEngine.open(database_path(path), df1, digest), path)
+
+def load_state_cache(name, path=DATA_PATH, maxsize=32):
+    """ LRU cache (see delish.cache) of results keyed on the sidebar filter state (see
+        delish.filters.filter_key), e.g. rendered maps or KPIs. One cache per name, dropped when
+        the dataset changes. Misses are read from the artifacts precomputed for this dataset
+        version (see delish.precompute) before being computed live.
+    """
+    store = ArtifactStore(dataset_digest(path))
+
+    return load_derived(STATE_CACHE_PREFIX + name, lambda df1: StateCache(name, store, maxsize), path)
+
+def append_orders(raw_batch, path=DATA_PATH):
+    """ Appends a batch of raw order rows to a store without recomputing the history.
+
+        Only the batch is cleaned. It is written to the store as a new part and folded into the
+        cached running aggregates (cube and weekly driver sets) in place. The cached frame picks
+        the batch up with a single concatenation on its next read, and the filter index is
+        rebuilt lazily on its next use.
+
+        Input: raw dataframe with the columns of the csv, path of a store written by delish.ingest
+        Output: the batch as cleaned
+
+    """
+    if not is_store(path):
+        raise ValueError('incremental appends need a columnar store, ingest {!r} first with delish.ingest'.format(path))
+    check_cleaning_version(path, read_manifest(path))
+
+    df1 = clean_dataframe(raw_batch)
+
+    with _lock:
+        append_to_store(path, df1, rows_in=len(raw_batch))
+
+        entry = _cache.get(path)
+        if entry is not None:
+            manifest = source_file(path)
+            entry['stat'], entry['digest'] = file_stat(manifest), file_digest(manifest)
+            entry['pending'].append(df1)
+
+            if 'aggregates' in entry['artifacts']:
+                entry['artifacts']['aggregates'].update(df1)
+            for name in [name for name in entry['artifacts'] if name in ('filter', 'spatial', 'engine:duckdb') or name.startswith(STATE_CACHE_PREFIX)]:
+                del entry['artifacts'][name]
+
+    return df1
+
+def clear_cache():
+    """ Drops every cached dataset, forcing the next load_orders call to rebuild. """
+    with _lock:
+        _cache.clear()
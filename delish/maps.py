@@ -0,0 +1,110 @@
+""" Folium maps of the delivery locations, rendered once per filter state as cached HTML. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy as np
+
+from delish.lazy    import lazy_import
+from delish.spatial import coordinate_flags
+
+folium = lazy_import('folium')
+plugins = lazy_import('folium.plugins')
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+MAP_CENTER = [19.552911, 76.902847]
+MAP_ZOOM = 7
+
+# 'Central regions': one marker per (City, Road_traffic_density) median location
+# 'Clusters': every delivery location, clustered in the browser from a compact coordinate array
+# 'Heatmap': density of the delivery locations
+MAP_MODES = ['Central regions', 'Clusters', 'Heatmap']
+
+# above this many points the clusters and heatmap use an evenly spaced sample, so the payload
+# stays bounded at any data volume
+MAX_MAP_POINTS = 100_000
+
+# coordinates are sent with 5 decimals (~1 m), enough for a map and a much smaller payload
+COORDINATE_DECIMALS = 5
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def central_regions(df1):
+    """ Median delivery location by city and traffic density. """
+    return (df1.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']]
+               .groupby(['City', 'Road_traffic_density'], observed=True)
+               .median()
+               .reset_index())
+
+def delivery_points(df1, max_points=MAX_MAP_POINTS, valid=None):
+    """ Delivery locations as an (n, 2) array of [lat, long] of the orders with valid
+        coordinates (`valid`, their mask from the spatial index, otherwise flagged from df1),
+        thinned to at most max_points rows and rounded to COORDINATE_DECIMALS.
+    """
+    if valid is None:
+        valid = coordinate_flags(df1) == 0
+    points = df1.loc[:, ['Delivery_location_latitude', 'Delivery_location_longitude']].to_numpy()[valid]
+
+    if len(points) > max_points:
+        points = points[np.linspace(0, len(points) - 1, max_points).astype(np.intp)]
+
+    return points.round(COORDINATE_DECIMALS)
+
+def heat_cells(spatial, selection=None):
+    """ [lat, long, weight] of every occupied delivery cell of the spatial index (see
+        delish.spatial.SpatialIndex.density), at the cell center and weighted by its share of
+        the busiest cell's orders.
+    """
+    cells = spatial.density(selection=selection)
+    half = spatial.grids['delivery'].cell_degrees / 2
+    orders = cells['orders'].to_numpy(dtype=np.float64)
+
+    return np.column_stack([cells['latitude'] + half, cells['longitude'] + half, orders / orders.max() if len(orders) else orders]).round(COORDINATE_DECIMALS)
+
+def build_map(df1, mode='Central regions', spatial=None, selection=None):
+    """
+        Builds the folium map for the filtered orders.
+
+        Parameters
+        ----------
+            Input:
+                df1: Dataframe with the filtered orders
+                mode: str, one of MAP_MODES
+                spatial: delish.spatial.SpatialIndex, optional. With the filter `selection`
+                    df1 was taken with, the clusters skip the flagged orders from its
+                    flags and the heatmap is drawn from its cell aggregates
+
+            Output:
+                folium.Map
+
+    """
+    mapa = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM)
+
+    if mode == 'Central regions':
+        df_regions = central_regions(df1)
+        for lat, long, city in zip(df_regions['Delivery_location_latitude'].tolist(),
+                                   df_regions['Delivery_location_longitude'].tolist(),
+                                   df_regions['City'].tolist()):
+            folium.Marker([lat, long], city).add_to(mapa)
+
+    elif mode == 'Clusters':
+        valid = None if spatial is None else spatial.valid_rows(selection)
+        plugins.FastMarkerCluster(delivery_points(df1, valid=valid).tolist()).add_to(mapa)
+
+    elif mode == 'Heatmap':
+        points = delivery_points(df1) if spatial is None else heat_cells(spatial, selection)
+        plugins.HeatMap(points.tolist(), radius=8).add_to(mapa)
+
+    else:
+        raise ValueError('unknown map mode {!r}, expected one of {}'.format(mode, MAP_MODES))
+
+    return mapa
+
+def map_html(df1, mode='Central regions', spatial=None, selection=None):
+    """ Standalone HTML of the map, what folium_static would send to the browser. """
+    return folium.Figure().add_child(build_map(df1, mode, spatial, selection)).render()
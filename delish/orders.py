@@ -0,0 +1,67 @@
+""" Charts of the Orders page, computed from a filtered query of the configured engine (see delish.engines).
+
+    Every chart function takes fig=False to return the table it plots instead (see delish.api).
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+from delish.cube    import rollup
+from delish.lazy    import lazy_import
+from delish.figures import bar_chart, line_chart, scatter_chart
+
+px = lazy_import('plotly.express')
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def orders_by_grain(query, grain, fig=True):
+    # orders per hour, day, week or month (delish.timegrain.GRAINS) of a filtered query (see delish.engines)
+    df1 = query.orders_by_grain(grain)
+    if not fig:
+        return df1
+
+    fig = bar_chart(df1, x='Order_Timestamp', y='ID', name='orders_by_grain')
+
+    return fig
+
+def traffic_orders_share(df_cube, fig=True):
+    df1 = rollup(df_cube, ['Road_traffic_density']).rename(columns={'orders': 'ID'})
+    df1['delivery_perc'] = df1['ID'] / df1['ID'].sum()
+    if not fig:
+        return df1
+
+    fig = px.pie(df1, values='delivery_perc', names='Road_traffic_density')
+
+    return fig
+
+def order_city_traffic(df_cube, fig=True):
+    df1 = rollup(df_cube, ['City', 'Road_traffic_density']).rename(columns={'orders': 'ID'})
+    if not fig:
+        return df1
+
+    fig = scatter_chart(df1, x='City', y='Road_traffic_density', size='ID', name='order_city_traffic', color='City')
+                
+    return fig
+        
+def orders_by_week(df_cube, fig=True):
+    df1 = rollup(df_cube, ['Week_Of_Year']).rename(columns={'orders': 'ID'})
+    if not fig:
+        return df1
+
+    fig = bar_chart(df1, x='Week_Of_Year', y='ID', name='orders_by_week')
+            
+    return fig
+        
+        
+def orders_driver_weekly(query, fig=True):
+    # orders and unique delivery people per week of a filtered query (see delish.engines)
+    df1 = query.weekly_drivers()
+    df1['Orders_By_Delivery_Person_Weekly'] = df1['ID'] / df1['Delivery_person_ID']
+    if not fig:
+        return df1
+
+    fig = line_chart(df1, x='Week_Of_Year', y='Orders_By_Delivery_Person_Weekly', name='orders_driver_weekly')
+
+    return fig
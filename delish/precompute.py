@@ -0,0 +1,162 @@
+""" Batch worker that materializes the per filter state artifacts of the pages ahead of time.
+
+    The dataset is loaded once, then a process pool computes, for every state of a grid of
+    common sidebar filters (each weekly date cutoff x every non-empty subset of the traffic
+    conditions), the headline KPIs, the per-city fastest/slowest delivery people, the distance
+    by city chart and the map of every map mode, and writes them to the artifact store (see
+    delish.artifacts). The pages read a state from there on its first request and compute live
+    only the states outside the grid.
+
+        python -m delish.precompute [data/train.csv] --out data/precomputed --workers 4
+
+    Rerun it after the dataset changes: artifacts are keyed on the dataset version, so the
+    pages never read the ones of an older version.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import time
+import argparse
+import itertools
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from delish.cube            import filter_cube
+from delish.kpis            import filter_state_kpis
+from delish.maps            import MAP_MODES, map_html
+from delish.loader          import DATA_PATH, dataset_digest, load_filter, load_cube, load_spatial, load_aggregates
+from delish.filters         import filter_key
+from delish.artifacts       import PRECOMPUTE_DIR, TRAFFIC_ORDER, ArtifactStore
+from delish.restaurants     import delivery_distance
+from delish.delivery_person import top_deliveries
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+ARTIFACTS = ['kpis', 'rankings', 'distance', 'maps']
+
+# dataset loaded once per worker process (see init_worker)
+_worker = {}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def weekly_cutoffs(dates, end=None):
+    """ Date cutoffs one week apart, from `end` (default: the last order date, the sidebar's
+        default value) back to the first order date.
+    """
+    first = dates.min().normalize()
+    end = pd.Timestamp(end) if end is not None else dates.max().normalize()
+
+    weeks = max((end - first).days // 7, 0) + 1
+
+    return list(pd.date_range(end=end, periods=weeks, freq='7D')[::-1])
+
+def traffic_subsets(options=TRAFFIC_ORDER):
+    """ Every non-empty subset of the traffic conditions, largest first. """
+    return [list(subset) for size in range(len(options), 0, -1) for subset in itertools.combinations(options, size)]
+
+def filter_states(cutoffs, subsets):
+    """ (date cutoff, traffic options) grid. """
+    return [(cutoff, options) for cutoff in cutoffs for options in subsets]
+
+def init_worker(path, directory):
+    """ Loads the dataset of a worker process, a no-op when it was inherited from the parent. """
+    _worker['filter'] = load_filter(path)
+    _worker['cube'] = load_cube(path)
+    _worker['aggregates'] = load_aggregates(path)
+    _worker['spatial'] = load_spatial(path)
+    _worker['store'] = ArtifactStore(dataset_digest(path), directory)
+
+def materialize(state, artifacts=ARTIFACTS):
+    """
+        Computes and stores the artifacts of one filter state.
+
+        Parameters
+        ----------
+            Input:
+                state: (date cutoff, traffic options)
+                artifacts: names of the artifacts to write, a subset of ARTIFACTS
+
+            Output:
+                (state, number of files written, seconds)
+
+    """
+    start = time.perf_counter()
+    date_limit, traffic_options = state
+    store = _worker['store']
+    key = filter_key(date_limit, traffic_options)
+
+    df1 = _worker['filter'].select(date_limit, traffic_options)
+    selection = _worker['filter'].select_positions(date_limit, traffic_options)
+    valid = _worker['spatial'].valid_rows(selection)
+    df_cube = filter_cube(_worker['cube'], date_limit, traffic_options)
+
+    written = 0
+    if 'kpis' in artifacts:
+        store.write('kpis', key, filter_state_kpis(df1, df_cube, _worker['aggregates'], date_limit, traffic_options, valid))
+        written += 1
+
+    if 'rankings' in artifacts:
+        store.write('rankings', key, top_deliveries(df1))
+        written += 1
+
+    if 'distance' in artifacts:
+        store.write('distance', key, delivery_distance(df1, fig=True, valid=valid))
+        written += 1
+
+    if 'maps' in artifacts:
+        for mode in MAP_MODES:
+            store.write('maps', (key, mode), map_html(df1, mode, _worker['spatial'], selection))
+            written += 1
+
+    return state, written, time.perf_counter() - start
+
+def precompute(path=DATA_PATH, directory=PRECOMPUTE_DIR, workers=None, end=None, artifacts=ARTIFACTS):
+    """
+        Materializes the artifacts of the whole filter grid with a process pool.
+
+        Parameters
+        ----------
+            Input:
+                path: dataset (csv or store)
+                directory: artifact store folder
+                workers: number of processes (default: one per CPU)
+                end: last date cutoff (default: the last order date)
+                artifacts: names of the artifacts to write
+
+            Output:
+                list of (state, files written, seconds), in grid order
+
+    """
+    # loaded here once: forked workers inherit the cached frame, cube and filter index
+    init_worker(path, directory)
+    states = filter_states(weekly_cutoffs(_worker['filter'].df1['Order_Date'], end), traffic_subsets())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path, directory)) as pool:
+        return list(pool.map(materialize, states, itertools.repeat(artifacts)))
+
+# ======================================================================================================
+# COMMAND LINE
+# ======================================================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute the page artifacts of a grid of filter states.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='dataset csv or store')
+    parser.add_argument('--out', default=PRECOMPUTE_DIR, help='artifact store folder')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per CPU)')
+    parser.add_argument('--end', default=None, help='last date cutoff, YYYY-MM-DD (default: the last order date)')
+    parser.add_argument('--artifacts', nargs='+', choices=ARTIFACTS, default=ARTIFACTS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = precompute(args.path, args.out, args.workers, args.end, args.artifacts)
+
+    print('{} filter states, {} files written to {} in {:.1f}s ({:.2f}s per state in the workers)'.format(
+          len(results), sum(written for _, written, _ in results), ArtifactStore(dataset_digest(args.path), args.out).root,
+          time.perf_counter() - start, sum(seconds for _, _, seconds in results) / max(len(results), 1)))
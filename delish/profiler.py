@@ -0,0 +1,234 @@
+""" Per-rerun timings of the dashboard sections.
+
+    Every page creates a Profiler at the top of the script and wraps its blocks in
+    profiler.section(...). The page functions run as the tasks of a delish.sections.SectionRun,
+    each recorded as a step of its section (timed with the CPU time of the thread that ran it),
+    and the section blocks then time the rendering of their results. Each record holds the wall
+    and CPU time, the rows going in and out and the bytes of plotly figure JSON produced.
+    Profiling is off unless DELISH_PROFILE=1; then a sidebar panel shows the records of the last
+    rerun, and with DELISH_PROFILE_LOG=profile.csv every rerun is appended to that csv.
+
+    The pages can also be profiled in batch, without a Streamlit server (the widgets keep their
+    default values):
+
+        python -m delish.profiler pages/*.py [--repeat 3] [--data data/train.csv] [--csv profile.csv]
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import io
+import sys
+import time
+import runpy
+import logging
+import argparse
+import warnings
+import itertools
+
+from collections import deque
+from contextlib  import contextmanager
+
+import pandas as pd
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+PROFILE_ENV = 'DELISH_PROFILE'
+PROFILE_LOG_ENV = 'DELISH_PROFILE_LOG'
+
+FIELDS = ['page', 'run', 'section', 'step', 'wall_s', 'cpu_s', 'rows_in', 'rows_out', 'figure_bytes', 'started_at']
+
+# profilers of the last reruns in this process, newest last (read by the batch mode)
+finished = deque(maxlen=100)
+
+_run_ids = itertools.count(1)
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def is_enabled():
+    """ Whether DELISH_PROFILE asks for profiling. """
+    return os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+def count_rows(value):
+    """ Rows of a dataframe, series or array (summed over a tuple or list of them), else None. """
+    if isinstance(value, (tuple, list)):
+        counts = [count_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+
+    if getattr(value, 'ndim', 0) >= 1:
+        return len(value)
+
+    return None
+
+def figure_bytes(value):
+    """ Size of the JSON a plotly figure (or a tuple or list of them) sends to the browser, else None. """
+    if isinstance(value, (tuple, list)):
+        sizes = [figure_bytes(item) for item in value]
+        sizes = [size for size in sizes if size is not None]
+        return sum(sizes) if sizes else None
+
+    if hasattr(value, 'to_plotly_json'):
+        return len(value.to_json().encode())
+
+    return None
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class Section:
+    """ Handle of an open profiler section, used to record what the block produces. """
+
+    def __init__(self, profiler, name, rows_in=None):
+        self.profiler = profiler
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.figure_bytes = None
+
+    def output(self, value):
+        """ Records the rows and figure bytes of a value produced in the block and returns it. """
+        if self.profiler.enabled:
+            rows, size = count_rows(value), figure_bytes(value)
+            self.rows_out = rows if self.rows_out is None else self.rows_out + (rows or 0)
+            self.figure_bytes = size if self.figure_bytes is None else self.figure_bytes + (size or 0)
+
+        return value
+
+class Profiler:
+    """ Collects the section records of one page rerun (see the module docstring). """
+
+    def __init__(self, page, enabled=None):
+        self.page = page
+        self.enabled = is_enabled() if enabled is None else enabled
+        self.run = next(_run_ids)
+        self.records = []
+
+    @contextmanager
+    def timed(self, section, step, rows_in=None, cpu_clock=time.process_time):
+        """ Times a block and appends its record, yielded so the caller can complete it. Blocks
+            run on other threads pass cpu_clock=time.thread_time, to count only their own CPU time.
+        """
+        record = {'page': self.page, 'run': self.run, 'section': section, 'step': step, 'rows_in': rows_in,
+                  'rows_out': None, 'figure_bytes': None, 'started_at': pd.Timestamp.now().isoformat()}
+        wall, cpu = time.perf_counter(), cpu_clock()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = cpu_clock() - cpu
+            self.records.append(record)
+
+    @contextmanager
+    def section(self, name, rows_in=None):
+        """ Profiles a block of the page, e.g. `with st.container(), profiler.section('Orders by Day'):` """
+        section = Section(self, name, rows_in)
+        if not self.enabled:
+            yield section
+            return
+
+        with self.timed(name, '', rows_in) as record:
+            yield section
+
+        record['rows_out'], record['figure_bytes'] = section.rows_out, section.figure_bytes
+
+    def report(self):
+        """ The records as a dataframe, in the order the blocks finished. """
+        df_report = pd.DataFrame(self.records, columns=FIELDS)
+
+        return df_report.astype({'wall_s': 'float64', 'cpu_s': 'float64', 'rows_in': 'float64', 'rows_out': 'float64', 'figure_bytes': 'float64'})
+
+    def write_csv(self, path):
+        """ Appends the records to a csv, writing the header when the file is new. """
+        header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.report().to_csv(path, mode='a', header=header, index=False)
+
+    def finish(self):
+        """ Ends the rerun: logs the records and shows the sidebar panel when profiling is on. """
+        if not self.enabled:
+            return
+
+        finished.append(self)
+
+        log_path = os.environ.get(PROFILE_LOG_ENV)
+        if log_path:
+            self.write_csv(log_path)
+
+        self.sidebar_panel()
+
+    def sidebar_panel(self):
+        import streamlit as st
+
+        df_report = self.report()
+        with st.sidebar.expander('Profiler', expanded=False):
+            st.metric('Page wall time (s)', round(df_report.loc[df_report['step'] == '', 'wall_s'].sum(), 3))
+            st.dataframe(df_report.drop(columns=['page', 'run', 'started_at']))
+
+            buffer = io.StringIO()
+            df_report.to_csv(buffer, index=False)
+            st.download_button('Download csv', buffer.getvalue(), file_name='profile_{}.csv'.format(self.run), mime='text/csv')
+
+# ======================================================================================================
+# COMMAND LINE
+# ======================================================================================================
+
+def run_headless(page_paths, repeat=1):
+    """ Runs every page script `repeat` times in this process, without a Streamlit server, and
+        returns the records of all the reruns as one dataframe.
+    """
+    os.environ[PROFILE_ENV] = '1'
+    if '' not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    # the pages import delish.profiler, which is not this module when run with python -m
+    from delish.profiler import finished as page_profilers
+
+    profilers = []
+    with warnings.catch_warnings():
+        # streamlit warns on every call made without a server
+        warnings.simplefilter('ignore')
+        logging.disable(logging.WARNING)
+
+        try:
+            for _ in range(repeat):
+                for path in page_paths:
+                    runpy.run_path(path, run_name='__main__')
+                    profilers.append(page_profilers[-1])
+        finally:
+            logging.disable(logging.NOTSET)
+
+    return pd.concat([profiler.report() for profiler in profilers], ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Profiles the dashboard pages without a Streamlit server.')
+    parser.add_argument('pages', nargs='+')
+    parser.add_argument('--repeat', type=int, default=1, help='reruns of every page, the first one loads the data')
+    parser.add_argument('--data', help='dataset path (sets DELISH_DATA_PATH)')
+    parser.add_argument('--csv', help='write every record to this csv')
+    args = parser.parse_args()
+
+    if args.data:
+        os.environ['DELISH_DATA_PATH'] = args.data
+
+    df_records = run_headless(args.pages, args.repeat)
+
+    if args.csv:
+        df_records.to_csv(args.csv, index=False)
+
+    # median of the warm reruns (every run when there is only one)
+    df_warm = df_records.loc[df_records['run'] > df_records.groupby('page')['run'].transform('min')] if args.repeat > 1 else df_records
+    df_summary = (df_warm.groupby(['page', 'section', 'step'], sort=False)[['wall_s', 'cpu_s', 'rows_in', 'rows_out', 'figure_bytes']]
+                         .median()
+                         .round(4))
+
+    with pd.option_context('display.width', 200, 'display.max_rows', 200, 'display.max_columns', 10):
+        print(df_summary)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+""" Per-group top-N / bottom-N rankings, e.g. the fastest and slowest delivery people of every city. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def group_bounds(sorted_codes):
+    """ Start position and size of every run of equal codes in a sorted code array. """
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(sorted_codes)])
+
+    return starts, sizes
+
+def run_offsets(counts):
+    """ 0, 1, ..., count - 1 for every count, concatenated. """
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def pair_means(df1, group, key, value):
+    """ Mean of `value` per observed (group, key) pair, as a Series indexed by the pair in
+        sorted order (what df1.groupby([group, key], observed=True)[value].mean() returns).
+
+        When both columns are categoricals with a small product of categories, the pairs are
+        combined into one cell code and summed with np.bincount, which allocates one integer
+        per row instead of the group-by's per-key codes, indexer and sorted copies.
+    """
+    group_column, key_column = df1[group], df1[key]
+    categorical = isinstance(group_column.dtype, pd.CategoricalDtype) and isinstance(key_column.dtype, pd.CategoricalDtype)
+
+    if not categorical or len(group_column.cat.categories) * len(key_column.cat.categories) > max(len(df1), 1 << 16):
+        return df1.groupby([group, key], observed=True)[value].mean().sort_index()
+
+    n_keys = len(key_column.cat.categories)
+    values = df1[value].to_numpy(dtype=np.float64)
+
+    cells = group_column.cat.codes.to_numpy().astype(np.intp) * n_keys + key_column.cat.codes.to_numpy()
+    valid = (group_column.cat.codes.to_numpy() >= 0) & (key_column.cat.codes.to_numpy() >= 0) & ~np.isnan(values)
+    cells, values = cells[valid], values[valid]
+
+    n_cells = len(group_column.cat.categories) * n_keys
+    counts = np.bincount(cells, minlength=n_cells)
+    sums = np.bincount(cells, weights=values, minlength=n_cells)
+
+    occupied = np.flatnonzero(counts)
+    index = pd.MultiIndex(levels=[pd.CategoricalIndex(group_column.cat.categories, dtype=group_column.dtype),
+                                  pd.CategoricalIndex(key_column.cat.categories, dtype=key_column.dtype)],
+                          codes=[occupied // n_keys, occupied % n_keys], names=[group, key])
+
+    return pd.Series(sums[occupied] / counts[occupied], index=index, name=value)
+
+def top_bottom_n(df1, n=10, group='City', key='Delivery_person_ID', value='Time_taken(min)'):
+    """
+        Smallest and largest mean of `value` per `key` inside every `group`, in one pass.
+
+        The means are computed with a single group-by and ranked with a single vectorized sort
+        over (group, mean, key), so the cost does not depend on how many groups there are. The
+        groups are whatever values `group` holds (sorted by name), none is hard-coded. Ties are
+        broken by `key`.
+
+        Parameters
+        ----------
+            Input:
+                df1: Dataframe with the filtered orders, or a filtered query of another engine
+                    (see delish.engines), which ranks them itself
+                n: how many rows to keep per group
+                group: column to rank within (e.g. City)
+                key: column to rank (e.g. Delivery_person_ID)
+                value: column averaged per (group, key)
+
+            Output:
+                (df_smallest, df_largest): Dataframes with the group, key and mean value columns,
+                the n smallest means of every group in ascending order and the n largest in
+                descending order
+
+    """
+    if not isinstance(df1, pd.DataFrame):
+        return df1.top_bottom_n(n, group, key, value)
+
+    means = pair_means(df1, group, key, value)
+
+    group_codes, _ = pd.factorize(means.index.get_level_values(0), sort=True)
+    key_codes, _ = pd.factorize(means.index.get_level_values(1), sort=True)
+    order = np.lexsort((key_codes, means.to_numpy(), group_codes))
+
+    starts, sizes = group_bounds(group_codes[order])
+    counts = np.minimum(sizes, n)
+    offsets = run_offsets(counts)
+
+    smallest = order[np.repeat(starts, counts) + offsets]
+    largest = order[np.repeat(starts + sizes - 1, counts) - offsets]
+
+    return means.iloc[smallest].reset_index(), means.iloc[largest].reset_index()
@@ -0,0 +1,110 @@
+""" Metrics and charts of the Restaurants page. """
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy as np
+
+from delish.cube    import rollup
+from delish.lazy    import lazy_import
+from delish.spatial import coordinate_flags
+
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def delivery_distance(df1, fig, valid=None):
+    """ Average restaurant to delivery distance, using the Distance_delivery column computed
+        during cleaning. Only the orders with valid coordinates are averaged: `valid` is their
+        mask from the spatial index (see delish.spatial.SpatialIndex.valid_rows), otherwise
+        they are flagged from df1.
+
+        If fig=False returns the overall average (km), otherwise a pie chart with the
+        average distance by city.
+
+    """
+    if valid is None:
+        valid = coordinate_flags(df1) == 0
+    df1 = df1.loc[valid, ['City', 'Distance_delivery']]
+
+    if fig == False:
+        avg_distance = np.round(df1['Distance_delivery'].mean(), 2)
+
+        return avg_distance
+    
+    else:
+        avg_distance = df1.groupby('City', observed=True).mean().sort_index().reset_index()
+
+        fig = go.Figure(data=[go.Pie(labels=avg_distance['City'], values=avg_distance['Distance_delivery'], pull=[0, 0.05, 0])])
+        
+        return fig
+    
+def festival_time_delivery_avg_std(df_cube, festival, op):
+    """
+        Calculates the average and standard deviation of the delivery time in case there is a festival.
+                    
+        Parameters
+        ----------
+            Input:
+                df_cube: orders cube (see delish.cube) with the filters applied
+
+                festival:str {'Yes', 'No'}
+                    'Yes': if there is a festival.
+                    'No': if there is no festival.
+
+                op: str {'avg_time', 'std_time'}
+                    'avg_time': calculates the average delivery time
+                    'std_time': calculates the standard deviation of the delivery time
+
+            Output:
+                df_festival: Dataframe with 2 columns and 1 row with the results
+                    
+    """
+    df_festival = rollup(df_cube, ['Festival'], 'Time_taken(min)')
+    df_festival = df_festival.loc[:, ['Festival', 'mean', 'std']]
+    df_festival.columns = ['Festival', 'avg_time', 'std_time']
+    df_festival = np.round(df_festival.loc[df_festival['Festival'] == festival, op], 2)
+                
+    return df_festival
+
+
+def delivery_city_avg_std(df_cube, fig=True):
+    df_delivery_city = rollup(df_cube, ['City'], 'Time_taken(min)')
+    df_delivery_city = df_delivery_city.loc[:, ['City', 'mean', 'std']]
+    df_delivery_city.columns = ['City', 'avg_time', 'std_time']
+    if not fig:
+        return df_delivery_city
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Delivery Time', x=df_delivery_city['City'], y=df_delivery_city['avg_time'], 
+                                     error_y=dict(type='data', array=df_delivery_city['std_time'])))
+
+    fig.update_layout(barmode='group')
+            
+    return fig
+            
+def delivery_city_order_avg_std(df_cube):
+    df_delivery_city_order = rollup(df_cube, ['City', 'Type_of_order'], 'Time_taken(min)')
+    df_delivery_city_order = df_delivery_city_order.loc[:, ['City', 'Type_of_order', 'mean', 'std']]
+    df_delivery_city_order.columns = ['City', 'Type_of_order', 'Time_taken_mean', 'Time_taken_std']
+    df_delivery_city_order = df_delivery_city_order.reset_index()
+
+    return df_delivery_city_order
+
+def delivery_city_traffic_avg_std(df_cube, fig=True):
+    df_delivery_city_traffic = rollup(df_cube, ['City', 'Road_traffic_density'], 'Time_taken(min)')
+    df_delivery_city_traffic = df_delivery_city_traffic.loc[:, ['City', 'Road_traffic_density', 'mean', 'std']]
+
+    df_delivery_city_traffic.columns = ['City', 'Road_traffic_density', 'avg_time', 'std_time']
+
+    df_delivery_city_traffic = df_delivery_city_traffic.reset_index()
+    if not fig:
+        return df_delivery_city_traffic
+
+    fig = px.sunburst(df_delivery_city_traffic, path=['City', 'Road_traffic_density'], values='avg_time', 
+                                  color='std_time', color_continuous_scale='RdBu', 
+                                  color_continuous_midpoint=np.average(df_delivery_city_traffic['std_time']))
+    return fig
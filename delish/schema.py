@@ -0,0 +1,108 @@
+""" Explicit compact dtypes for the cleaned orders dataframe.
+
+    Low-cardinality text columns become categoricals and small integers/ratings use the
+    narrowest type that holds them, which cuts the in-memory footprint of the cached frame
+    several times over. Group-bys on the categorical columns must pass observed=True, otherwise
+    pandas builds every combination of categories. pandas 1.5 then returns the groups in order of
+    appearance, so follow with sort_index() wherever the order is shown.
+
+    Print the per-column memory report for a csv with:
+
+        python -m delish.schema data/train.csv
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import sys
+
+import pandas as pd
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# categories are inferred per frame (sorted, like a plain groupby would order them)
+SCHEMA = {
+    'Delivery_person_ID': 'category',
+    'Delivery_person_Age': 'int8',
+    'Delivery_person_Ratings': 'float32',
+    'Time_Orderd': 'category',
+    'Time_Order_picked': 'category',
+    'Weatherconditions': 'category',
+    'Road_traffic_density': 'category',
+    'Vehicle_condition': 'int8',
+    'Type_of_order': 'category',
+    'Type_of_vehicle': 'category',
+    'multiple_deliveries': 'int8',
+    'Festival': 'category',
+    'City': 'category',
+    'Time_taken(min)': 'int16',
+    'Order_Date_Day': 'int8',
+    'Week_Of_Year': 'int8',
+}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def apply_schema(df1, schema=SCHEMA):
+    """ Casts the columns listed in the schema (and present in the frame) to their compact dtype. """
+    dtypes = {column: dtype for column, dtype in schema.items() if column in df1.columns}
+
+    return df1.astype(dtypes)
+
+def widen(df1):
+    """ The same frame with the wide dtypes pandas produces without a schema: object text,
+        int64 and float64. Used as the baseline of memory_report.
+    """
+    dtypes = {}
+    for column, dtype in df1.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = object
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = 'int64'
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[column] = 'float64'
+
+    return df1.astype(dtypes)
+
+def memory_report(before, after):
+    """
+        Bytes used by every column before and after applying the schema.
+
+        Parameters
+        ----------
+            Input:
+                before: dataframe with the original dtypes (see widen)
+                after: the same dataframe after apply_schema
+
+            Output:
+                Dataframe indexed by column with 'dtype_before', 'dtype_after', 'bytes_before',
+                'bytes_after' and 'ratio' (before / after), plus a 'TOTAL' row
+
+    """
+    df_report = pd.DataFrame({'dtype_before': before.dtypes.astype(str),
+                              'dtype_after': after.dtypes.astype(str),
+                              'bytes_before': before.memory_usage(deep=True, index=False),
+                              'bytes_after': after.memory_usage(deep=True, index=False)})
+
+    df_report.loc['TOTAL', ['bytes_before', 'bytes_after']] = df_report[['bytes_before', 'bytes_after']].sum()
+    df_report = df_report.fillna('').astype({'bytes_before': 'int64', 'bytes_after': 'int64'})
+    df_report['ratio'] = (df_report['bytes_before'] / df_report['bytes_after']).round(1)
+
+    return df_report
+
+# ======================================================================================================
+# REPORT
+# ======================================================================================================
+
+if __name__ == '__main__':
+    from delish.cleaning import clean_dataframe
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'data/train.csv'
+    after = clean_dataframe(pd.read_csv(csv_path))
+    before = widen(after)
+
+    with pd.option_context('display.width', 200, 'display.max_rows', 100, 'display.max_columns', 10):
+        print(memory_report(before, after))
@@ -0,0 +1,192 @@
+""" Concurrent computation of the independent sections of a page rerun.
+
+    The pages read the sidebar filters (and the widgets the sections depend on) first, then
+    submit every section computation of the rerun to a shared thread pool and render the results
+    in page order, waiting only for the one they are about to draw:
+
+        sections = SectionRun.start(st.session_state, profiler)
+        task = sections.submit('Avg Delivery Time by City', delivery_city_avg_std, query)
+        ...
+        st.plotly_chart(task.result(), use_container_width=True)
+
+    The computations only read the shared filtered frame, query and caches, and the Streamlit
+    calls stay on the script thread. Threads rather than processes: the frames and the figures
+    are shared, not pickled, and pandas and numpy release the GIL in their inner loops. Every
+    task is timed (wall time and the CPU time of its thread), and added to the page's profiler
+    records when profiling is on.
+
+    A rerun of the same session (a widget change, or moving to another page) supersedes the
+    previous one: its tasks that have not started are cancelled, and the results of the running
+    ones are dropped. DELISH_SECTION_WORKERS sets the pool size; 0 computes every task in the
+    script thread when it is submitted, as before.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import time
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor, CancelledError
+
+from delish.profiler import count_rows, figure_bytes
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+SECTION_WORKERS = int(os.environ.get('DELISH_SECTION_WORKERS', min(4, os.cpu_count() or 1)))
+
+# session state key of the session's current rerun
+STATE_KEY = 'delish_section_run'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def section_pool(workers=SECTION_WORKERS):
+    """ Thread pool shared by the reruns of every session (None when workers is 0). """
+    global _pool
+
+    if workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='delish-section')
+
+    return _pool
+
+def input_rows(value):
+    """ The rows a task reads from its first argument: the selected orders of a query of the
+        engines (see delish.engines), or the argument itself.
+    """
+    df1 = getattr(value, 'df1', None)
+
+    return value if df1 is None else df1
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class Superseded(Exception):
+    """ Raised for the result of a task whose rerun was superseded by a newer one. """
+
+class Task:
+    """ A submitted section computation: its future, and its timing once it ran. """
+
+    def __init__(self, run, section, step, future):
+        self.run = run
+        self.section = section
+        self.step = step
+        self.future = future
+        self.rows_in = None
+        self.wall_s = None
+        self.cpu_s = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """ The value of the computation, waiting for it; raises Superseded when the rerun was. """
+        if self.run.cancelled.is_set():
+            raise Superseded(self.section)
+
+        try:
+            value = self.future.result(timeout)
+        except CancelledError:
+            raise Superseded(self.section) from None
+
+        if self.run.cancelled.is_set():
+            raise Superseded(self.section)
+
+        return value
+
+class SectionRun:
+    """ The section tasks of one page rerun (see the module docstring). """
+
+    def __init__(self, profiler=None, pool=None):
+        self.profiler = profiler
+        self.pool = pool
+        self.tasks = []
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def start(cls, state, profiler=None, workers=SECTION_WORKERS):
+        """ Starts the rerun of a session, cancelling the one it supersedes. `state` is the
+            session state (st.session_state), or any dict kept across the reruns of a session.
+        """
+        run = cls(profiler, section_pool(workers))
+
+        previous = state.get(STATE_KEY)
+        if previous is not None:
+            previous.cancel()
+        state[STATE_KEY] = run
+
+        return run
+
+    def submit(self, section, fn, *args, **kwargs):
+        """ Schedules fn(*args, **kwargs) as a step of a page section. """
+        task = self._task(section, fn, args)
+        self._schedule(task, lambda: self._timed(task, lambda: fn(*args, **kwargs)))
+
+        return task
+
+    def cached(self, section, cache, key, fn, *args, **kwargs):
+        """ Schedules cache.get_or_compute(key, ...) with fn(*args, **kwargs) computing a miss
+            (see delish.artifacts.StateCache); only a miss is timed as a step.
+        """
+        task = self._task(section, fn, args)
+        self._schedule(task, lambda: cache.get_or_compute(key, lambda: self._timed(task, lambda: fn(*args, **kwargs))))
+
+        return task
+
+    def cancel(self):
+        """ Cancels the tasks that have not started and drops the results of the running ones. """
+        self.cancelled.set()
+        for task in self.tasks:
+            task.future.cancel()
+
+    def _task(self, section, fn, args):
+        task = Task(self, section, fn.__name__, Future())
+        if args and self.profiler is not None and self.profiler.enabled:
+            task.rows_in = count_rows(input_rows(args[0]))
+        self.tasks.append(task)
+
+        return task
+
+    def _schedule(self, task, compute):
+        def work():
+            if self.cancelled.is_set():
+                raise Superseded(task.section)
+            return compute()
+
+        if self.pool is not None:
+            task.future = self.pool.submit(work)
+            return
+
+        try:
+            task.future.set_result(work())
+        except Exception as error:
+            task.future.set_exception(error)
+
+    def _timed(self, task, compute):
+        """ Runs compute(), recording the wall and thread CPU time on the task and the profiler. """
+        if self.profiler is None or not self.profiler.enabled:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            value = compute()
+            task.wall_s, task.cpu_s = time.perf_counter() - wall, time.thread_time() - cpu
+
+            return value
+
+        with self.profiler.timed(task.section, task.step, task.rows_in, cpu_clock=time.thread_time) as record:
+            value = compute()
+
+        task.wall_s, task.cpu_s = record['wall_s'], record['cpu_s']
+        record['rows_out'], record['figure_bytes'] = count_rows(value), figure_bytes(value)
+
+        return value
@@ -0,0 +1,121 @@
+""" HyperLogLog sketches for approximate distinct counts (e.g. unique delivery people).
+
+    A sketch keeps m = 2**precision one-byte registers whatever the number of values it has
+    seen, and two sketches merge by taking the register-wise maximum, so per-day sketches can be
+    combined over any date range and updated batch by batch. The estimate has a relative
+    standard error of about 1.04 / sqrt(m): 1.6% at the default precision of 12 (4 KiB per
+    sketch), i.e. within +-3.3% about 95% of the time. Small counts (below 2.5 * m) use the
+    linear counting correction, which is not exact either: about 1% relative error up to a few
+    thousand values (around 10 off at 1,000), rising to 2-3% near the 10,000 switch-over.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+HLL_PRECISION = 12
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def hash_values(column):
+    """ 64-bit hash of every row of a column (a categorical is hashed once per category) and
+        the mask of the rows that hold a value.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        hashes = pd.util.hash_array(column.cat.categories.to_numpy(dtype=object)).take(codes)
+        return hashes, codes >= 0
+
+    return pd.util.hash_array(column.to_numpy(dtype=object)), column.notna().to_numpy()
+
+def register_ranks(hashes, precision=HLL_PRECISION):
+    """ (register index, rank) of every hash: the first `precision` bits pick the register, the
+        rank is the position of the first 1 bit in the rest.
+    """
+    tail_bits = 64 - precision
+    index = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+    tail = hashes & np.uint64((1 << tail_bits) - 1)
+
+    bit_length = np.zeros(len(tail), dtype=np.int64)
+    nonzero = tail > 0
+    bit_length[nonzero] = np.floor(np.log2(tail[nonzero].astype(np.float64))).astype(np.int64) + 1
+
+    return index, (tail_bits - bit_length + 1).astype(np.uint8)
+
+def grouped_registers(group_codes, n_groups, hashes, precision=HLL_PRECISION):
+    """ Registers of one sketch per group (n_groups x m array) in a single vectorized pass. """
+    m = 1 << precision
+    index, rank = register_ranks(hashes, precision)
+
+    registers = np.zeros(n_groups * m, dtype=np.uint8)
+    np.maximum.at(registers, group_codes.astype(np.intp) * m + index, rank)
+
+    return registers.reshape(n_groups, m)
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class HyperLogLog:
+    """ Mergeable distinct-count sketch (see the module docstring for the error bound). """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    @classmethod
+    def from_column(cls, column, precision=HLL_PRECISION):
+        hashes, valid = hash_values(column)
+
+        sketch = cls(precision)
+        sketch.update(hashes[valid])
+
+        return sketch
+
+    def update(self, hashes):
+        """ Adds 64-bit hashes (see hash_values) to the sketch. """
+        index, rank = register_ranks(hashes, self.precision)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """ Folds another sketch of the same precision into this one, in place. """
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches of precision {} and {}'.format(self.precision, other.precision))
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+        return self
+
+    def __or__(self, other):
+        return HyperLogLog(self.precision, self.registers.copy()).merge(other)
+
+    def __ior__(self, other):
+        return self.merge(other)
+
+    def count(self):
+        """ Estimated number of distinct values added. """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
+
+    @classmethod
+    def union(cls, sketches, precision=HLL_PRECISION):
+        """ One sketch counting the values of all the given ones. """
+        merged = cls(precision)
+        for sketch in sketches:
+            merged.merge(sketch)
+
+        return merged
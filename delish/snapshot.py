@@ -0,0 +1,133 @@
+""" Columnar on-disk snapshot of the cleaned orders dataset.
+
+    The cleaned, typed dataframe is written next to the source csv as an uncompressed Feather
+    (Arrow IPC) file, e.g. data/train.csv -> data/train.feather. Later processes memory-map the
+    snapshot instead of parsing and cleaning the csv again. The snapshot records the csv
+    fingerprint and the cleaning version it was built from, so it is rebuilt only when one of
+    them changes.
+
+    Build it ahead of time with:
+
+        python -m delish.snapshot data/train.csv
+
+    or let delish.loader create it lazily on the first load.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+import sys
+import json
+
+try:
+    import pyarrow         as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is optional, loaders fall back to the csv
+    pa = None
+
+from delish.cleaning import CLEANING_VERSION
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+METADATA_KEY = b'delish'
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def snapshot_path(csv_path):
+    """ Path of the snapshot that belongs to a csv: same folder and name, .feather extension. """
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+def snapshot_metadata(path):
+    """ Reads only the snapshot schema metadata, without touching the column data.
+
+        Output: dict with the source fingerprint and cleaning version, or None when the snapshot
+                does not exist, is unreadable or pyarrow is not installed.
+    """
+    if pa is None or not os.path.exists(path):
+        return None
+
+    try:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    metadata = schema.metadata or {}
+    if METADATA_KEY not in metadata:
+        return None
+
+    return json.loads(metadata[METADATA_KEY])
+
+def is_fresh(metadata, stat, digest_fn):
+    """ Tells whether a snapshot still matches its source csv.
+
+        Parameters
+        ----------
+            metadata: dict returned by snapshot_metadata (or None)
+            stat: (size, mtime_ns) of the csv right now
+            digest_fn: callable returning the csv content hash, only called when the cheap
+                       stat comparison is not enough (e.g. the file was copied or touched)
+    """
+    if metadata is None or metadata.get('cleaning_version') != CLEANING_VERSION:
+        return False
+
+    if tuple(metadata.get('stat', ())) == tuple(stat):
+        return True
+
+    return metadata.get('digest') == digest_fn()
+
+def read_snapshot(path):
+    """ Loads a snapshot (or any file written by write_frame), memory-mapping it so untouched
+        pages are never read.
+    """
+    table = feather.read_table(path, memory_map=True)
+
+    return table.to_pandas(split_blocks=True)
+
+def write_frame(df1, path, metadata=None):
+    """ Writes a dataframe as an uncompressed Feather file (required for memory-mapping).
+
+        The file is written to a temporary name and renamed, so a concurrent reader never sees a
+        half written file. `metadata` (a json-serializable dict) is stored in the schema and can
+        be read back with snapshot_metadata. Returns False when pyarrow is not available or the
+        folder is not writable.
+    """
+    if pa is None:
+        return False
+
+    table = pa.Table.from_pandas(df1, preserve_index=True)
+    if metadata is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)})
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    return True
+
+def write_snapshot(df1, path, stat, digest):
+    """ Writes the snapshot of a cleaned csv, recording the csv fingerprint and cleaning version. """
+    metadata = {'stat': list(stat), 'digest': digest, 'cleaning_version': CLEANING_VERSION}
+
+    return write_frame(df1, path, metadata)
+
+# ======================================================================================================
+# BUILD STEP
+# ======================================================================================================
+
+if __name__ == '__main__':
+    from delish.loader import DATA_PATH, build_orders, file_stat
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    build_orders(csv_path, file_stat(csv_path))
+    print('snapshot ready:', snapshot_path(csv_path))
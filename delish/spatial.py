@@ -0,0 +1,234 @@
+""" Uniform grid index over the restaurant and delivery coordinates of the orders.
+
+    Built once per dataset (see delish.loader.load_spatial). Every order is checked once: rows
+    with a (0, 0) or out of range coordinate, or whose restaurant and delivery location are
+    MAX_DISTANCE_KM or more apart, get a flag and are left out of the grids, so no query has to
+    filter them again. The valid points are bucketed into cells of CELL_DEGREES x CELL_DEGREES
+    and stored sorted by cell with CSR offsets (the rows of cell c are
+    order[offsets[c]:offsets[c + 1]]), along with per-cell aggregates.
+
+    Cells are numbered row-major (latitude rows, longitude columns), so the cells of one grid row
+    inside a bounding box are contiguous in the sorted order: a bounding-box query reads one slice
+    per grid row and checks exact coordinates only on the candidates, and a radius query is a
+    bounding-box query refined with the haversine distance. Both cost depends on the cells and
+    rows they return, not on the size of the dataset.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import numpy  as np
+import pandas as pd
+
+from delish.geo import MAX_DISTANCE_KM, haversine_km
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# cell side in degrees (~5.5 km of latitude)
+CELL_DEGREES = 0.05
+
+# km per degree of latitude, to turn a radius into a bounding box
+KM_PER_DEGREE = 111.195
+
+# coordinate flags of an order, combined bitwise (0 = valid)
+FLAG_ZERO = 1          # a (0, 0) restaurant or delivery location
+FLAG_OUT_OF_RANGE = 2  # missing, |latitude| > 90 or |longitude| > 180
+FLAG_TOO_FAR = 4       # restaurant and delivery location MAX_DISTANCE_KM or more apart
+
+ROLES = {'restaurant': ('Restaurant_latitude', 'Restaurant_longitude'),
+         'delivery': ('Delivery_location_latitude', 'Delivery_location_longitude')}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def coordinate_flags(df1):
+    """ FLAG_* bits of every order (see the module docstring), as a uint8 array. """
+    flags = np.zeros(len(df1), dtype=np.uint8)
+
+    for latitude, longitude in ROLES.values():
+        lat = df1[latitude].to_numpy(dtype=np.float64)
+        lon = df1[longitude].to_numpy(dtype=np.float64)
+
+        flags[(lat == 0) & (lon == 0)] |= FLAG_ZERO
+        flags[~((np.abs(lat) <= 90) & (np.abs(lon) <= 180))] |= FLAG_OUT_OF_RANGE
+
+    distance = df1['Distance_delivery'].to_numpy(dtype=np.float64)
+    flags[~(distance < MAX_DISTANCE_KM)] |= FLAG_TOO_FAR
+
+    return flags
+
+def restrict(positions, selection):
+    """ The positions (sorted) that are also in a filter selection: a slice, or sorted positions
+        as returned by delish.filters.OrderFilter.select_positions. None keeps them all.
+    """
+    if selection is None:
+        return positions
+
+    if isinstance(selection, slice):
+        return positions[(positions >= (selection.start or 0)) & (positions < selection.stop)]
+
+    return positions[np.isin(positions, selection, assume_unique=True)]
+
+# ======================================================================================================
+# CLASSES
+# ======================================================================================================
+
+class GridIndex:
+    """ CSR grid of one set of points (see the module docstring). """
+
+    def __init__(self, lat, lon, valid, cell_degrees=CELL_DEGREES):
+        self.lat = lat
+        self.lon = lon
+        self.cell_degrees = cell_degrees
+
+        points = np.flatnonzero(valid)
+        if len(points):
+            self.lat0, self.lon0 = lat[points].min(), lon[points].min()
+            self.n_rows = int((lat[points].max() - self.lat0) // cell_degrees) + 1
+            self.n_cols = int((lon[points].max() - self.lon0) // cell_degrees) + 1
+        else:
+            self.lat0 = self.lon0 = 0.0
+            self.n_rows = self.n_cols = 1
+
+        cells = self.cell_of(lat[points], lon[points])
+        order = np.argsort(cells, kind='stable')
+
+        self.order = points[order]
+        self.cells = cells[order]
+
+        counts = np.bincount(self.cells, minlength=self.n_rows * self.n_cols)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def cell_of(self, lat, lon):
+        """ Cell id of points inside the grid. """
+        rows = ((lat - self.lat0) // self.cell_degrees).astype(np.intp)
+        cols = ((lon - self.lon0) // self.cell_degrees).astype(np.intp)
+
+        return rows * self.n_cols + cols
+
+    def cell_bounds(self):
+        """ (south latitude, west longitude) of every cell, as two arrays indexed by cell id. """
+        cells = np.arange(self.n_rows * self.n_cols)
+
+        return self.lat0 + (cells // self.n_cols) * self.cell_degrees, self.lon0 + (cells % self.n_cols) * self.cell_degrees
+
+    def bbox(self, lat_min, lat_max, lon_min, lon_max):
+        """ Sorted positions of the points with lat_min <= lat <= lat_max and lon_min <= lon <= lon_max. """
+        row_min = max(int((lat_min - self.lat0) // self.cell_degrees), 0)
+        row_max = min(int((lat_max - self.lat0) // self.cell_degrees), self.n_rows - 1)
+        col_min = max(int((lon_min - self.lon0) // self.cell_degrees), 0)
+        col_max = min(int((lon_max - self.lon0) // self.cell_degrees), self.n_cols - 1)
+
+        if row_min > row_max or col_min > col_max:
+            return np.empty(0, dtype=np.intp)
+
+        # one contiguous run of the sorted points per grid row
+        parts = [self.order[self.offsets[row * self.n_cols + col_min]:self.offsets[row * self.n_cols + col_max + 1]]
+                 for row in range(row_min, row_max + 1)]
+        candidates = np.concatenate(parts)
+
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+
+        return np.sort(candidates[inside])
+
+    def within_radius(self, lat, lon, radius_km):
+        """ Sorted positions of the points within radius_km (great-circle) of (lat, lon). """
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+
+        candidates = self.bbox(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+        distance = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+
+        return candidates[distance <= radius_km]
+
+class SpatialIndex:
+    """
+        Grid indexes of the restaurant and delivery locations of a cleaned frame.
+
+        Positions returned by the queries are row positions in that frame. Build it over
+        OrderFilter.df1 (as delish.loader.load_spatial does) to combine the queries with a
+        sidebar filter state through the `selection` argument (see restrict).
+
+        Attributes:
+            flags: FLAG_* bits of every row
+            grids: {'restaurant': GridIndex, 'delivery': GridIndex}
+            cells: Dataframe of the occupied delivery cells with cell, latitude / longitude
+                (south-west corner), orders, center_latitude / center_longitude (mean location)
+                and time_taken_mean (mean Time_taken(min))
+
+    """
+
+    def __init__(self, df1, cell_degrees=CELL_DEGREES):
+        self.flags = coordinate_flags(df1)
+        valid = self.flags == 0
+
+        self.grids = {role: GridIndex(df1[latitude].to_numpy(dtype=np.float64), df1[longitude].to_numpy(dtype=np.float64), valid, cell_degrees)
+                      for role, (latitude, longitude) in ROLES.items()}
+
+        self.cells = self.cell_aggregates(self.grids['delivery'], df1['Time_taken(min)'].to_numpy(dtype=np.float64))
+
+    @staticmethod
+    def cell_aggregates(grid, time_taken):
+        """ Per occupied cell aggregates of a grid (see the class docstring). """
+        occupied = np.flatnonzero(np.diff(grid.offsets))
+        starts = grid.offsets[occupied]
+        orders = np.diff(grid.offsets)[occupied]
+
+        south, west = grid.cell_bounds()
+
+        return pd.DataFrame({'cell': occupied,
+                             'latitude': south[occupied],
+                             'longitude': west[occupied],
+                             'orders': orders,
+                             'center_latitude': np.add.reduceat(grid.lat[grid.order], starts) / orders if len(starts) else [],
+                             'center_longitude': np.add.reduceat(grid.lon[grid.order], starts) / orders if len(starts) else [],
+                             'time_taken_mean': np.add.reduceat(time_taken[grid.order], starts) / orders if len(starts) else []})
+
+    @property
+    def valid(self):
+        return self.flags == 0
+
+    def valid_rows(self, selection=None):
+        """ Mask of the orders with valid coordinates among the rows of a filter selection (see
+            restrict), aligned with OrderFilter.df1.iloc[selection].
+        """
+        return self.valid if selection is None else self.valid[selection]
+
+    def bbox(self, lat_min, lat_max, lon_min, lon_max, role='delivery', selection=None):
+        """ Positions of the valid orders whose `role` location ('restaurant' or 'delivery') is
+            inside the bounding box, optionally restricted to a filter selection.
+        """
+        return restrict(self.grids[role].bbox(lat_min, lat_max, lon_min, lon_max), selection)
+
+    def within_radius(self, lat, lon, radius_km, role='delivery', selection=None):
+        """ Positions of the valid orders whose `role` location is within radius_km of (lat, lon). """
+        return restrict(self.grids[role].within_radius(lat, lon, radius_km), selection)
+
+    def orders_near_restaurant(self, lat, lon, radius_km, selection=None):
+        """ Positions of the valid orders delivered within radius_km of a restaurant at (lat, lon). """
+        return self.within_radius(lat, lon, radius_km, 'delivery', selection)
+
+    def density(self, lat_min=-90, lat_max=90, lon_min=-180, lon_max=180, selection=None):
+        """ Orders per occupied delivery cell inside a bounding box (cells whose south-west corner
+            falls in it). Without a selection this reads the precomputed cell aggregates; with
+            one, only the selected orders are counted.
+        """
+        cells = self.cells
+        inside = cells['latitude'].between(lat_min, lat_max) & cells['longitude'].between(lon_min, lon_max)
+        cells = cells.loc[inside, ['cell', 'latitude', 'longitude', 'orders']]
+
+        if selection is None:
+            return cells.reset_index(drop=True)
+
+        grid = self.grids['delivery']
+        selected = np.zeros(len(self.flags), dtype=bool)
+        selected[selection] = True
+        counts = np.bincount(grid.cells[selected[grid.order]], minlength=grid.n_rows * grid.n_cols)
+
+        cells = cells.assign(orders=counts[cells['cell'].to_numpy()])
+
+        return cells.loc[cells['orders'] > 0].reset_index(drop=True)
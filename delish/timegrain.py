@@ -0,0 +1,66 @@
+""" Time buckets of the orders: hourly rollups, from which the day, week and month views derive.
+
+    Cleaning parses Order_Date + Time_Orderd into Order_Timestamp. The running aggregates (see
+    delish.incremental) keep the orders per (hour, Road_traffic_density), a few thousand cells
+    however many rows there are, and every coarser grain is a regrouping of those cells, so
+    switching the grain of a chart never rescans the rows.
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import pandas as pd
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+# grain shown in the selector -> pandas period of its buckets (weeks start on Monday, as ISO weeks)
+GRAINS = {'Hour': 'h', 'Day': 'D', 'Week': 'W-SUN', 'Month': 'M'}
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+def bucket_start(timestamps, grain):
+    """ Start of the `grain` bucket (a key of GRAINS) of every timestamp of a Series. """
+    if grain not in GRAINS:
+        raise ValueError('unknown time grain {!r}, expected one of {}'.format(grain, list(GRAINS)))
+
+    if grain in ('Hour', 'Day'):
+        return timestamps.dt.floor(GRAINS[grain])
+
+    # period start times are always in nanoseconds, keep the resolution of the timestamps
+    return timestamps.dt.to_period(GRAINS[grain]).dt.start_time.astype(timestamps.dtype)
+
+def hourly_orders(df1):
+    """ Orders of a cleaned frame per (Order_Hour, Road_traffic_density), as a Series. Rows with
+        no order time are left out.
+    """
+    hours = df1['Order_Timestamp'].dt.floor(GRAINS['Hour']).rename('Order_Hour')
+
+    return df1.groupby([hours, df1['Road_traffic_density']], observed=True).size()
+
+def rollup_grain(df_hourly, date_limit, traffic_options, grain):
+    """
+        Orders per time bucket for a sidebar filter state, from the hourly rollup.
+
+        Parameters
+        ----------
+            Input:
+                df_hourly: Dataframe with Order_Hour, Road_traffic_density and orders
+                date_limit: only days before it are counted (as the Order_Date filter)
+                traffic_options: list of Road_traffic_density values to keep
+                grain: one of GRAINS
+
+            Output:
+                Dataframe with Order_Timestamp (start of each bucket) and ID (orders), in time order
+
+    """
+    rows_selected = ((df_hourly['Order_Hour'].dt.normalize() < pd.Timestamp(date_limit))
+                     & df_hourly['Road_traffic_density'].isin(traffic_options))
+    df1 = df_hourly.loc[rows_selected, :]
+
+    buckets = bucket_start(df1['Order_Hour'], grain).rename('Order_Timestamp')
+
+    return df1.groupby(buckets)['orders'].sum().rename('ID').reset_index()
@@ -1,116 +1,33 @@
 # Libraries Imports
 import datetime
-import folium
 
-import pandas               as pd
-import numpy                as np
-import streamlit            as st
-import plotly.express       as px
-import matplotlib.pyplot    as plt
-import plotly.graph_objects as go
+import streamlit               as st
+import streamlit.components.v1 as components
 
-from PIL              import Image
-from haversine        import haversine, Unit
-from streamlit_folium import folium_static
+from PIL import Image
+
+from delish.filters   import filter_key
+from delish.maps      import MAP_MODES, map_html
+from delish.orders    import orders_by_grain, traffic_orders_share, order_city_traffic, orders_by_week, orders_driver_weekly
+from delish.loader    import load_filter, load_engine, load_spatial, load_state_cache
+from delish.profiler  import Profiler
+from delish.sections  import SectionRun
+from delish.timegrain import GRAINS
 
 st.set_page_config(page_title='Orders', page_icon=':heavy_dollar_sign:', layout='wide')
 
+profiler = Profiler('Orders')
+
 # ======================================================================================================
 # FUNCTIONS
 # ======================================================================================================
 
-def clean_dataframe(df1):
-    """ This function is responsible for cleaning the dataframe
-        
-        Actions executed:
-        1. NaN data removed
-        2. Data types conversion
-        3. Blank spaces removed
-        4. Creates a day and week of year columns
-        5. Cleans text on the Time_taken(min) column
-        
-        Input: Dataframe
-        Output: Dataframe
-    
+def orders_central_region_map(html):
+    """ Renders the delivery locations map (see delish.maps.map_html): median markers by city
+        and traffic, clustered delivery locations or a heatmap, depending on the map view.
+
     """
-    # removing NA
-    df1 = df1.loc[(df1['Delivery_person_Age'] != 'NaN '), :]
-    df1 = df1.loc[(df1['City'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Road_traffic_density'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Festival'] != 'NaN '), :]
-    df1 = df1.loc[(df1['multiple_deliveries'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Time_Orderd'] != 'NaN '), :]
-    
-    # data types conversion
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    # removing blank spaces
-    # columns - ID, Road_traffic_density, Type_of_order, Type_of_vehicle, City, Festival
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    # time taken column
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip(('(min) ')).astype(int)
-    
-    # creating the day and week of year columns
-    df1['Order_Date_Day'] = df1.Order_Date.dt.day.astype(int)
-    df1['Week_Of_Year'] = df1.Order_Date.dt.isocalendar().week.astype(int)
-    
-    return df1
-
-def orders_day_metric(df1):
-    df1 = df1.loc[:, ['ID', 'Order_Date_Day']].groupby('Order_Date_Day').count().reset_index()
-    fig = px.bar(df1, x='Order_Date_Day', y='ID');
-                        
-    return fig
-
-def traffic_orders_share(df1):
-    df1 = df1.loc[:, ['ID', 'Road_traffic_density']].groupby('Road_traffic_density').count().reset_index()
-    df1['delivery_perc'] = df1['ID'] / df1['ID'].sum()
-    
-    fig = px.pie(df1, values='delivery_perc', names='Road_traffic_density')
-
-    return fig
-
-def order_city_traffic(df1):
-    df1 = df1.loc[:,['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
-    fig = px.scatter(df1, x='City', y='Road_traffic_density', size='ID', color='City')
-                
-    return fig
-        
-def orders_by_week(df1):
-    df1 = df1.loc[:, ['ID', 'Week_Of_Year']].groupby('Week_Of_Year').count().reset_index()
-    fig = px.bar(df1, x='Week_Of_Year', y='ID')
-            
-    return fig
-        
-        
-def orders_driver_weekly(df1):
-    df_aux1 = df1.loc[:, ['ID', 'Week_Of_Year']].groupby('Week_Of_Year').count().reset_index()
-    df_aux2 = df1.loc[:, ['Delivery_person_ID', 'Week_Of_Year']].groupby('Week_Of_Year').nunique().reset_index()
-
-    df1 = pd.merge(df_aux1, df_aux2, how='inner')
-    df1['Orders_By_Delivery_Person_Weekly'] = df1['ID'] / df1['Delivery_person_ID']
-
-    fig = px.line(df1, x='Week_Of_Year', y='Orders_By_Delivery_Person_Weekly')
-
-    return fig
-
-def orders_central_region_map(df1):
-    df1 = df1.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']].groupby(['City', 'Road_traffic_density']).median().reset_index()
-
-    mapa = folium.Map(location=[19.552911,76.902847], zoom_start=7)
-    
-    for index, location_info in df1.iterrows():
-        folium.Marker([location_info['Delivery_location_latitude'], location_info['Delivery_location_longitude']], location_info['City']).add_to(mapa)
-    
-    folium_static(mapa, width=1400, height=600)
+    components.html(html, width=1400, height=610)
 
     return None
 
@@ -120,11 +37,12 @@ def orders_central_region_map(df1):
 # LOADING DATA
 # ======================================================================================================
 
-# Loading Dataset
-df = pd.read_csv('data/train.csv')
-
-# cleaning the data
-df1 = clean_dataframe(df)
+# Loading the filter engine over the cleaned dataset and the query engine of the metrics (cached and shared by every page and session)
+with profiler.section('Loading data'):
+    order_filter = load_filter()
+    engine = load_engine()
+    spatial = load_spatial()
+    map_cache = load_state_cache('maps')
 
 # ======================================================================================================
 # SIDEBAR
@@ -141,9 +59,9 @@ st.sidebar.markdown("""---""")
 
 st.sidebar.markdown('## Select the date')
 date_slider = st.sidebar.slider('Limit date',
-                  value=pd.Timestamp(2022, 4, 6),
-                  min_value=pd.Timestamp(2022, 2, 11),
-                  max_value=pd.Timestamp(2022, 4, 6),
+                  value=datetime.datetime(2022, 4, 6),
+                  min_value=datetime.datetime(2022, 2, 11),
+                  max_value=datetime.datetime(2022, 4, 6),
                   format='DD/MM/YYYY')
 st.sidebar.markdown("""---""")
 
@@ -151,46 +69,63 @@ traffic_options = st.sidebar.multiselect('Traffic conditions', ['Low', 'Medium',
 
 st.sidebar.markdown("""---""")
 
-# DATE FILTER
-rows_selected = (df1['Order_Date'] < date_slider)
-df1 = df1.loc[rows_selected, :]
+with profiler.section('Filters', rows_in=len(order_filter.df1)) as section:
+    # DATE AND TRAFFIC FILTERS
+    df1 = section.output(order_filter.select(date_slider, traffic_options))
+
+    # same filters as a query of the configured engine (see delish.engines)
+    query = engine.query(date_slider, traffic_options, df1)
 
-# TRAFFIC FILTER
-rows_selected = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[rows_selected, :]
+    # the selected rows, for the coordinate flags and cell aggregates of the spatial index (see delish.spatial)
+    selection = order_filter.select_positions(date_slider, traffic_options)
 
 # ======================================================================================================
 # ORDERS TAB
 # ======================================================================================================
-with st.container():
-    # Orders Metric
-    st.markdown('# Orders by Day')
-    fig = orders_day_metric(df1)
-    st.plotly_chart(fig, use_container_width=True)       
 
-with st.container():
+# the containers in page order, with the widgets the sections depend on
+time_container, share_container, week_container, weekly_container, map_container = (st.container() for _ in range(5))
+
+time_container.markdown('# Orders over Time')
+grain = time_container.radio('Time grain', list(GRAINS), index=1, horizontal=True)
+
+map_container.markdown('# Orders Central Region')
+map_mode = map_container.radio('Map view', MAP_MODES, horizontal=True)
+
+# every section computation of the rerun, run concurrently and rendered below in page order (see delish.sections)
+sections = SectionRun.start(st.session_state, profiler)
+
+grain_task = sections.submit('Orders over Time', orders_by_grain, query, grain)
+traffic_share_task = sections.submit('Orders by Traffic and City', traffic_orders_share, query)
+city_traffic_task = sections.submit('Orders by Traffic and City', order_city_traffic, query)
+week_task = sections.submit('Orders by Week', orders_by_week, query)
+weekly_drivers_task = sections.submit('Weekly Orders by Delivery Person', orders_driver_weekly, query)
+# the map HTML is built at most once per (filter state, mode)
+map_task = sections.cached('Orders Central Region', map_cache, (filter_key(date_slider, traffic_options), map_mode), map_html, df1, map_mode, spatial, selection)
+
+with time_container, profiler.section('Orders over Time'):
+    st.plotly_chart(grain_task.result(), use_container_width=True)
+
+with share_container, profiler.section('Orders by Traffic and City'):
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('# Orders distribution by Traffic Type')
-        fig = traffic_orders_share(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(traffic_share_task.result(), use_container_width=True)
 
     with col2:
         st.markdown('# Comparison of the orders by city and traffic type')
-        fig = order_city_traffic(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(city_traffic_task.result(), use_container_width=True)
 
-with st.container():
+with week_container, profiler.section('Orders by Week'):
     st.markdown('# Orders by Week')
-    fig = orders_by_week(df1)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(week_task.result(), use_container_width=True)
 
-with st.container():
+with weekly_container, profiler.section('Weekly Orders by Delivery Person'):
     st.markdown('# Weekly Orders by Delivery Person')
-    fig = orders_driver_weekly(df1)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(weekly_drivers_task.result(), use_container_width=True)
+
+with map_container, profiler.section('Orders Central Region', rows_in=len(df1)):
+    orders_central_region_map(map_task.result())
 
-with st.container():
-    st.markdown('# Orders Central Region')
-    orders_central_region_map(df1)
+profiler.finish()
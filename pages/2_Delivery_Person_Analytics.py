@@ -1,90 +1,44 @@
 # Libraries Imports
 
 import datetime
-import folium
 
-import pandas               as pd
-import numpy                as np
-import streamlit            as st
-import plotly.express       as px
-import matplotlib.pyplot    as plt
-import plotly.graph_objects as go
+import streamlit as st
 
-from PIL                    import Image
-from haversine              import haversine, Unit
-from streamlit_folium       import folium_static
+from PIL import Image
+
+from delish.kpis            import filter_state_kpis
+from delish.filters         import filter_key
+from delish.loader          import load_filter, load_engine, load_spatial, load_aggregates, load_state_cache
+from delish.profiler        import Profiler
+from delish.sections        import SectionRun
+from delish.delivery_person import PAGE_COLUMNS, PAGE_SIZE, DRIVER_SORTS, build_driver_table, top_deliveries, ratings_by_traffic, ratings_by_weather
 
 st.set_page_config(page_title='Delivery Person', page_icon=':truck:', layout='wide')
 
+profiler = Profiler('Delivery Person')
+
 # ======================================================================================================
 # FUNCTIONS
 # ======================================================================================================
 
-def clean_dataframe(df1):
-    """ This function is responsible for cleaning the dataframe
-        
-        Actions executed:
-        1. NaN data removed
-        2. Data types conversion
-        3. Blank spaces removed
-        4. Creates a day and week of year columns
-        5. Cleans text on the Time_taken(min) column
-        
-        Input: Dataframe
-        Output: Dataframe
-    
-    """
-    # removing NA
-    df1 = df1.loc[(df1['Delivery_person_Age'] != 'NaN '), :]
-    df1 = df1.loc[(df1['City'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Road_traffic_density'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Festival'] != 'NaN '), :]
-    df1 = df1.loc[(df1['multiple_deliveries'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Time_Orderd'] != 'NaN '), :]
-    
-    # data types conversion
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    # removing blank spaces
-    # columns - ID, Road_traffic_density, Type_of_order, Type_of_vehicle, City, Festival
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    # time taken column
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip(('(min) ')).astype(int)
-    
-    # creating the day and week of year columns
-    df1['Order_Date_Day'] = df1.Order_Date.dt.day.astype(int)
-    df1['Week_Of_Year'] = df1.Order_Date.dt.isocalendar().week.astype(int)
-    
-    return df1
-
-def top_deliveries(df1, top_asc):
-    """ This function will organize the top fastest or slowest deliveries from the dataset.
-        
-        If top_asc=True will return the top 10 fastest deliveries and when top_asc=False
-        results in the top 10 slowest deliveries.
-        
+def driver_ratings_table(driver_table):
+    """ Renders one page of the driver ratings table (see delish.delivery_person.DriverTable).
+
+        Only the visible page is sent to the browser. The search box filters by driver ID
+        prefix and the sort and page controls pick the rows server-side.
+
     """
-    df2 = (df1.loc[:, ['Delivery_person_ID', 'City', 'Time_taken(min)']]
-                      .groupby(['City', 'Delivery_person_ID'])
-                      .mean()
-                      .sort_values(['City', 'Time_taken(min)'], ascending=top_asc).reset_index())
-            
-    df_top_aux1 = df2.loc[df2['City'] == 'Metropolitian', :].head(10)
-    df_top_aux2 = df2.loc[df2['City'] == 'Urban', :].head(10)
-    df_top_aux3 = df2.loc[df2['City'] == 'Semi-Urban', :].head(10)
-            
-    df3 = pd.concat([df_top_aux1, df_top_aux2, df_top_aux3]).reset_index(drop=True)
-            
-    return df3
+    search = st.text_input('Search driver ID', placeholder='e.g. BANGRES01')
+    sort = st.selectbox('Sort by', list(DRIVER_SORTS))
 
+    n_pages = max(-(-driver_table.count(search) // PAGE_SIZE), 1)
+    page = st.number_input('Page (of {})'.format(n_pages), min_value=1, max_value=n_pages, value=1, step=1)
+
+    df_page, total = driver_table.page(search, DRIVER_SORTS[sort], page, PAGE_SIZE)
+    st.dataframe(df_page)
+    st.caption('{} of {} delivery people'.format(len(df_page), total))
+
+    return None
 
 #--------------------------------------------------------------------CODE STRUCTURE----------------------------------------------------------------------------
 
@@ -92,11 +46,15 @@ def top_deliveries(df1, top_asc):
 # LOADING DATA
 # ======================================================================================================
 
-# Loading Dataset
-df = pd.read_csv('data/train.csv')
-
-# Cleaning Data
-df1 = clean_dataframe(df)
+# Loading the filter engine over the cleaned dataset and the query engine of the metrics (cached and shared by every page and session)
+with profiler.section('Loading data'):
+    order_filter = load_filter()
+    engine = load_engine()
+    spatial = load_spatial()
+    aggregates = load_aggregates()
+    kpi_cache = load_state_cache('kpis')
+    ranking_cache = load_state_cache('rankings')
+    driver_cache = load_state_cache('drivers')
 
 # ======================================================================================================
 # SIDEBAR
@@ -113,9 +71,9 @@ st.sidebar.markdown("""---""")
 
 st.sidebar.markdown('## Select the date')
 date_slider = st.sidebar.slider('Limit date',
-                  value=pd.Timestamp(2022, 4, 6),
-                  min_value=pd.Timestamp(2022, 2, 11),
-                  max_value=pd.Timestamp(2022, 4, 6),
+                  value=datetime.datetime(2022, 4, 6),
+                  min_value=datetime.datetime(2022, 2, 11),
+                  max_value=datetime.datetime(2022, 4, 6),
                   format='DD-MM-YYYY')
 st.sidebar.markdown("""---""")
 
@@ -123,88 +81,88 @@ traffic_options = st.sidebar.multiselect('Traffic conditions', ['Low', 'Medium',
 
 st.sidebar.markdown("""---""")
 
-# DATE FILTER
-rows_selected = (df1['Order_Date'] < date_slider)
-df1 = df1.loc[rows_selected, :]
+with profiler.section('Filters', rows_in=len(order_filter.df1)) as section:
+    # DATE AND TRAFFIC FILTERS
+    # only the columns the page reads, without copying them when the filter keeps every traffic condition
+    df1 = section.output(order_filter.select(date_slider, traffic_options, PAGE_COLUMNS))
+
+    # same filters as a query of the configured engine (see delish.engines)
+    query = engine.query(date_slider, traffic_options, df1)
 
-# TRAFFIC FILTER
-rows_selected = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[rows_selected, :]
+    # the selected rows and which of them have valid coordinates (see delish.spatial)
+    selection = order_filter.select_positions(date_slider, traffic_options)
+    valid = spatial.valid_rows(selection)
+
+# every section computation of the rerun, run concurrently and rendered below in page order (see delish.sections)
+sections = SectionRun.start(st.session_state, profiler)
+filter_state = filter_key(date_slider, traffic_options)
+
+# shared with the Restaurants page: computed once per filter state
+kpis_task = sections.cached('Delivery Person Metrics', kpi_cache, filter_state, filter_state_kpis, df1, query, aggregates, date_slider, traffic_options, valid=valid)
+driver_table_task = sections.cached('Ratings', driver_cache, filter_state, build_driver_table, df1)
+ratings_traffic_task = sections.submit('Ratings', ratings_by_traffic, query)
+ratings_weather_task = sections.submit('Ratings', ratings_by_weather, query)
+rankings_task = sections.cached('Delivery Time', ranking_cache, filter_state, top_deliveries, query)
 
 # ======================================================================================================
 # DELIVERY PERSON TAB
 # ======================================================================================================
-with st.container():
+with st.container(), profiler.section('Delivery Person Metrics'):
     st.title('Delivery Person Metrics')
 
-    df_person_metrics = df1.copy()
+    kpis = kpis_task.result()
 
     col1, col2, col3, col4 = st.columns(4, gap='medium')
 
     with col1:
-        maximum_age = df_person_metrics.loc[:, 'Delivery_person_Age'].max()
-        col1.metric('Maximum Age', maximum_age)
+        col1.metric('Maximum Age', kpis.maximum_age)
 
     with col2:
-        minimum_age = df_person_metrics.loc[:, 'Delivery_person_Age'].min()
-        col2.metric('Minimum Age', minimum_age)
+        col2.metric('Minimum Age', kpis.minimum_age)
 
     with col3:
-        best_condition = df_person_metrics.loc[:, 'Vehicle_condition'].max()
-        col3.metric('Best Vehicle Condition', best_condition)
+        col3.metric('Best Vehicle Condition', kpis.best_vehicle_condition)
 
     with col4:
-        worst_condition = df_person_metrics.loc[:, 'Vehicle_condition'].min()
-        col4.metric('Worst Vehicle Condition', worst_condition)
+        col4.metric('Worst Vehicle Condition', kpis.worst_vehicle_condition)
 
-with st.container():
+with st.container(), profiler.section('Ratings'):
     st.title('Ratings')
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('### Avg Ratings by Delivery Person')
-        df_delivery_ratings_mean = (df1.loc[:, ['Delivery_person_ID', 'Delivery_person_Ratings']].groupby('Delivery_person_ID').mean().reset_index())
-        st.dataframe(df_delivery_ratings_mean)
+        driver_ratings_table(driver_table_task.result())
 
     with col2:
         # media por trafego
         st.markdown('### Avg Ratings by Traffic')
-        df_ratings_traffic = df1.copy()
-
-        df_ratings_traffic = df_ratings_traffic.loc[:, ['Road_traffic_density', 'Delivery_person_Ratings']].groupby('Road_traffic_density').agg({'Delivery_person_Ratings' : ['mean', 'std']})
-
-        df_ratings_traffic.columns = ['Delivery_rating_mean', 'Delivery_rating_std']
-        df_ratings_traffic.reset_index()
+        df_ratings_traffic = ratings_traffic_task.result()
 
         st.dataframe(df_ratings_traffic)
 
         # media por clima
         st.markdown('### Avg Ratings by Weather')
-        df_ratings_weather = df1.copy()
-
-        df_ratings_weather['Weatherconditions'] = df_ratings_weather['Weatherconditions'].str.strip(('conditions '))
-        df_ratings_weather = df_ratings_weather.loc[df_ratings_weather['Weatherconditions'] != 'NaN', :]
-
-        df_ratings_weather = df_ratings_weather.loc[:, ['Weatherconditions', 'Delivery_person_Ratings']].groupby('Weatherconditions').agg({'Delivery_person_Ratings' : ['mean', 'std']})
-        df_ratings_weather.columns = ['Delivery_rating_mean', 'Delivery_rating_std']
-        df_ratings_weather.reset_index()
+        df_ratings_weather = ratings_weather_task.result()
 
         st.dataframe(df_ratings_weather)
 
-with st.container():
+with st.container(), profiler.section('Delivery Time'):
     st.title('Delivery Time')
 
     col1, col2 = st.columns(2)
 
+    df_fastest, df_slowest = rankings_task.result()
+
     with col1:
         st.markdown('### Fastest Deliveries by City')
-        df3 = top_deliveries(df1, top_asc=True)
-        st.dataframe(df3)
+        st.dataframe(df_fastest)
 
 
     with col2:
         st.markdown('### Slowest Deliveries by City')
-        df3 = top_deliveries(df1, top_asc=False)
-        st.dataframe(df3)
+        st.dataframe(df_slowest)
+
+profiler.finish()
 
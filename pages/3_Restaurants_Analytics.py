@@ -3,155 +3,36 @@
 # ======================================================================================================
 
 import datetime
-import folium
 
-import pandas               as pd
-import numpy                as np
-import streamlit            as st
-import plotly.express       as px
-import matplotlib.pyplot    as plt
-import plotly.graph_objects as go
+import streamlit as st
 
-from PIL              import Image
-from haversine        import haversine, Unit
-from streamlit_folium import folium_static
+from PIL import Image
+
+from delish.kpis        import filter_state_kpis
+from delish.filters     import filter_key
+from delish.loader      import load_filter, load_engine, load_spatial, load_aggregates, load_state_cache
+from delish.profiler    import Profiler
+from delish.sections    import SectionRun
+from delish.restaurants import delivery_distance, delivery_city_avg_std, delivery_city_order_avg_std, delivery_city_traffic_avg_std
 
 st.set_page_config(page_title='Restaurants', page_icon=':fork_and_knife:', layout='wide')
 
-# ======================================================================================================
-# FUNCTIONS
-# ======================================================================================================
+profiler = Profiler('Restaurants')
 
-def clean_dataframe(df1):
-    """ This function is responsible for cleaning the dataframe
-        
-        Actions executed:
-        1. NaN data removed
-        2. Data types conversion
-        3. Blank spaces removed
-        4. Creates a day and week of year columns
-        5. Cleans text on the Time_taken(min) column
-        
-        Input: Dataframe
-        Output: Dataframe
-    
-    """
-    # removing NA
-    df1 = df1.loc[(df1['Delivery_person_Age'] != 'NaN '), :]
-    df1 = df1.loc[(df1['City'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Road_traffic_density'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Festival'] != 'NaN '), :]
-    df1 = df1.loc[(df1['multiple_deliveries'] != 'NaN '), :]
-    df1 = df1.loc[(df1['Time_Orderd'] != 'NaN '), :]
-    
-    # data types conversion
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-    df1['Order_Date'] = pd.to_(df1['Order_Date'], format='%d-%m-%Y')
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
-    
-    # removing blank spaces
-    # columns - ID, Road_traffic_density, Type_of_order, Type_of_vehicle, City, Festival
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    # time taken column
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].str.strip(('(min) ')).astype(int)
-    
-    # creating the day and week of year columns
-    df1['Order_Date_Day'] = df1.Order_Date.dt.day.astype(int)
-    df1['Week_Of_Year'] = df1.Order_Date.dt.isocalendar().week.astype(int)
-    
-    return df1
-
-def delivery_distance(df1, fig):
-    if fig == False:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
-        df1['Distance_delivery'] = df1.loc[:, cols].apply(lambda x: haversine((x['Restaurant_latitude'], x['Restaurant_longitude']), 
-                                                                                 (x['Delivery_location_latitude'], x['Delivery_location_longitude']), unit='km'), axis=1)
-        df1 = df1.loc[df1['Distance_delivery'] < 100, :]
-        avg_distance = np.round(df1['Distance_delivery'].mean(), 2)
-
-        return avg_distance
-    
-    else:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
-        df1['Distance_delivery'] = df1.loc[:, cols].apply(lambda x: haversine((x['Restaurant_latitude'], x['Restaurant_longitude']), 
-                                                                                 (x['Delivery_location_latitude'], x['Delivery_location_longitude']), unit='km'), axis=1) 
-        df1 = df1.loc[df1['Distance_delivery'] < 100, :]
-        avg_distance = df1.loc[:, ['City', 'Distance_delivery']].groupby('City').mean().reset_index()
-
-        fig = go.Figure(data=[go.Pie(labels=avg_distance['City'], values=avg_distance['Distance_delivery'], pull=[0, 0.05, 0])])
-        
-        return fig
-    
-def festival_time_delivery_avg_std(df1, festival, op):
-    """
-        Calculates the average and standard deviation of the delivery time in case there is a festival.
-                    
-        Parameters
-        ----------
-            Input:
-                df1: Dataframe with the data necessary
-
-                festival:str {'Yes', 'No'}
-                    'Yes': if there is a festival.
-                    'No': if there is no festival.
-
-                op: str {'avg_time', 'std_time'}
-                    'avg_time': calculates the average delivery time
-                    'std_time': calculates the standard deviation of the delivery time
-
-            Output:
-                df_festival: Dataframe with 2 columns and 1 row with the results
-                    
-    """
-    df_festival = df1.loc[:, ['Festival', 'Time_taken(min)']].groupby('Festival').agg({'Time_taken(min)':['mean', 'std']}).reset_index()
-    df_festival.columns = ['Festival', 'avg_time', 'std_time']
-    df_festival = np.round(df_festival.loc[df_festival['Festival'] == festival, op], 2)
-                
-    return df_festival
-
-
-def delivery_city_avg_std(df1):
-    df_delivery_city = df1.loc[:, ['City', 'Time_taken(min)']].groupby('City').agg({'Time_taken(min)':['mean', 'std']})
-    df_delivery_city.columns = ['avg_time', 'std_time']
-    df_delivery_city = df_delivery_city.reset_index()
-    fig = go.Figure()
-    fig.add_trace(go.Bar(name='Delivery Time', x=df_delivery_city['City'], y=df_delivery_city['avg_time'], 
-                                     error_y=dict(type='data', array=df_delivery_city['std_time'])))
-
-    fig.update_layout(barmode='group')
-            
-    return fig
-            
-def delivery_city_traffic_avg_std(df1):
-    df_delivery_city_traffic = (df1.loc[:, ['Time_taken(min)', 'City', 'Road_traffic_density']]
-                                   .groupby(['City', 'Road_traffic_density'])
-                                   .agg({'Time_taken(min)':['mean', 'std']}).reset_index())
-
-    df_delivery_city_traffic.columns = ['City', 'Road_traffic_density', 'avg_time', 'std_time']
-
-    df_delivery_city_traffic = df_delivery_city_traffic.reset_index()
-    fig = px.sunburst(df_delivery_city_traffic, path=['City', 'Road_traffic_density'], values='avg_time', 
-                                  color='std_time', color_continuous_scale='RdBu', 
-                                  color_continuous_midpoint=np.average(df_delivery_city_traffic['std_time']))
-    return fig
-    
 #--------------------------------------------------------------------CODE STRUCTURE----------------------------------------------------------------------------
 
 # ======================================================================================================
 # LOADING DATA
 # ======================================================================================================
 
-# Loading Dataset
-df = pd.read_csv('data/train.csv')
-
-# cleaning the data
-df1 = clean_dataframe(df)
+# Loading the filter engine over the cleaned dataset and the query engine of the metrics (cached and shared by every page and session)
+with profiler.section('Loading data'):
+    order_filter = load_filter()
+    engine = load_engine()
+    spatial = load_spatial()
+    aggregates = load_aggregates()
+    kpi_cache = load_state_cache('kpis')
+    distance_cache = load_state_cache('distance')
 
 # ======================================================================================================
 # SIDEBAR
@@ -168,9 +49,9 @@ st.sidebar.markdown("""---""")
 
 st.sidebar.markdown('## Select the date')
 date_slider = st.sidebar.slider('Limit date',
-                  value=pd.Timestamp(2022, 4, 6),
-                  min_value=pd.Timestamp(2022, 2, 11),
-                  max_value=pd.Timestamp(2022, 4, 6),
+                  value=datetime.datetime(2022, 4, 6),
+                  min_value=datetime.datetime(2022, 2, 11),
+                  max_value=datetime.datetime(2022, 4, 6),
                   format='DD-MM-YYYY')
 st.sidebar.markdown("""---""")
 
@@ -178,83 +59,89 @@ traffic_options = st.sidebar.multiselect('Traffic conditions', ['Low', 'Medium',
 
 st.sidebar.markdown("""---""")
 
-# DATE FILTER
-rows_selected = (df1['Order_Date'] < date_slider)
-df1 = df1.loc[rows_selected, :]
+with profiler.section('Filters', rows_in=len(order_filter.df1)) as section:
+    # DATE AND TRAFFIC FILTERS
+    df1 = section.output(order_filter.select(date_slider, traffic_options))
+
+    # same filters as a query of the configured engine (see delish.engines)
+    query = engine.query(date_slider, traffic_options, df1)
+
+    # the selected rows and which of them have valid coordinates (see delish.spatial)
+    selection = order_filter.select_positions(date_slider, traffic_options)
+    valid = spatial.valid_rows(selection)
+
+# every section computation of the rerun, run concurrently and rendered below in page order (see delish.sections)
+sections = SectionRun.start(st.session_state, profiler)
+filter_state = filter_key(date_slider, traffic_options)
 
-# TRAFFIC FILTER
-rows_selected = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[rows_selected, :]
+# every metric of the row for this filter state, computed once and cached
+kpis_task = sections.cached('Time and Distance Metrics', kpi_cache, filter_state, filter_state_kpis, df1, query, aggregates, date_slider, traffic_options, valid=valid)
+city_task = sections.submit('Avg Delivery Time by City', delivery_city_avg_std, query)
+city_order_task = sections.submit('Avg Delivery Time by City', delivery_city_order_avg_std, query)
+distance_task = sections.cached('Distance and Traffic', distance_cache, filter_state, delivery_distance, df1, fig=True, valid=valid)
+city_traffic_task = sections.submit('Distance and Traffic', delivery_city_traffic_avg_std, query)
 
 # ======================================================================================================
 # RESTAURANTS TAB
 # ======================================================================================================
 
-with st.container():
+with st.container(), profiler.section('Time and Distance Metrics'):
     st.title('Time and Distance Metrics')
 
+    kpis = kpis_task.result()
+
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     st.markdown("""----""")
 
     with col1:
-        deliveryperson_unique = len(df1['Delivery_person_ID'].unique())
-        col1.metric('Unique Deliverers', deliveryperson_unique)
+        col1.metric('Unique Deliverers', kpis.unique_deliverers)
 
     with col2:
-        avg_distance = delivery_distance(df1, fig=False)
-        col2.metric('Avg Distance KM', avg_distance)
+        col2.metric('Avg Distance KM', kpis.avg_distance_km)
 
     with col3:
-
-        df_festival = festival_time_delivery_avg_std(df1, 'Yes', 'avg_time')      
-        col3.metric('Festival Avg Time', df_festival)
+        col3.metric('Festival Avg Time', kpis.festival_avg_time)
 
     with col4:
-
-        df_festival = festival_time_delivery_avg_std(df1, 'Yes', 'std_time')
-        col4.metric('Festival Std Time', df_festival)
+        col4.metric('Festival Std Time', kpis.festival_std_time)
 
     with col5:        
-
-        df_festival = festival_time_delivery_avg_std(df1, 'No', 'avg_time')
-        col5.metric('Delivery Avg Time', df_festival)
+        col5.metric('Delivery Avg Time', kpis.avg_time)
 
     with col6:                    
+        col6.metric('Delivery Std Time', kpis.std_time)
 
-        df_festival = festival_time_delivery_avg_std(df1, 'No', 'std_time')
-        col6.metric('Delivery Std Time', df_festival)
-
-with st.container():
+with st.container(), profiler.section('Avg Delivery Time by City'):
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('###### Avg Delivery Time by City')
 
-        fig = delivery_city_avg_std(df1)
+        fig = city_task.result()
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.markdown('###### Avg Delivery Time - City & Order Type')
 
-        df_delivery_city_order = df1.loc[:, ['Time_taken(min)', 'City', 'Type_of_order']].groupby(['City', 'Type_of_order']).agg({'Time_taken(min)':['mean', 'std']}).reset_index()
-        df_delivery_city_order.columns = ['City', 'Type_of_order', 'Time_taken_mean', 'Time_taken_std']
-        df_delivery_city_order = df_delivery_city_order.reset_index()
+        df_delivery_city_order = city_order_task.result()
 
         st.dataframe(df_delivery_city_order)
 
-with st.container():
+with st.container(), profiler.section('Distance and Traffic'):
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('###### Avg delivery distance by City')
 
-        fig = delivery_distance(df1, fig=True)
+        fig = distance_task.result()
         st.plotly_chart(fig, use_container_width=True)
 
 
     with col2:
         st.markdown('###### Avg Delivery Time by City and Traffic')
 
-        fig = delivery_city_traffic_avg_std(df1)
+        fig = city_traffic_task.result()
         st.plotly_chart(fig, use_container_width=True)
+
+profiler.finish()
@@ -0,0 +1,51 @@
+""" Regression test of delish.cleaning.clean_dataframe against the legacy implementation.
+
+    The output, for the whole file and concatenated from chunks, must match the clean_dataframe
+    that used to live in pages/1_Orders_Analytics.py (benchmarks.bench_cleaning
+    .legacy_clean_dataframe) with the steps the pipeline added since applied on top. It runs on
+    synthetic orders, and on data/train.csv when the dataset is there.
+
+        python -m pytest tests
+"""
+# ======================================================================================================
+# Libraries Imports
+# ======================================================================================================
+
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic      import synthetic_orders
+from benchmarks.bench_cleaning import expected_output
+from delish.cleaning           import clean_dataframe, concat_cleaned
+
+# ======================================================================================================
+# SETTINGS
+# ======================================================================================================
+
+DATA_PATH = 'data/train.csv'
+CHUNKSIZE = 10_000
+
+# ======================================================================================================
+# FUNCTIONS
+# ======================================================================================================
+
+@pytest.fixture(scope='module', params=['synthetic', 'train.csv'])
+def raw(request):
+    """ Raw orders as pd.read_csv returns them. """
+    if request.param == 'synthetic':
+        return synthetic_orders(25_000, seed=0)
+
+    if not os.path.isfile(DATA_PATH):
+        pytest.skip('{} is not there'.format(DATA_PATH))
+
+    return pd.read_csv(DATA_PATH)
+
+def test_whole_frame_matches_legacy(raw):
+    pd.testing.assert_frame_equal(clean_dataframe(raw), expected_output(raw))
+
+def test_chunks_match_legacy(raw):
+    chunks = [raw.iloc[start:start + CHUNKSIZE] for start in range(0, len(raw), CHUNKSIZE)]
+
+    pd.testing.assert_frame_equal(concat_cleaned(clean_dataframe(chunk) for chunk in chunks), expected_output(raw))